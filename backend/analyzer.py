@@ -1,5 +1,9 @@
+import json
+import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Set, Tuple
+
+import numpy as np
 
 # ---- 위험 신호 ----
 RISK_PATTERNS = [
@@ -39,80 +43,234 @@ EMOTIONS: Dict[str, List[str]] = {
     "희망": [r"괜찮아질", r"도움이\s*될", r"해볼\s*수\s*있", r"나아질"],
 }
 
-def _count_by_regex(text: str, patterns: List[str]) -> int:
-    return sum(1 for p in patterns if re.search(p, text))
-
-def analyze_messages(messages: List[str]) -> Dict[str, Any]:
-    texts = [t.lower() for t in messages]
-
-    # 1) 위험 탐지
-    risk_hits = []
-    for line in texts:
-        for rx in RISK_REGEX:
-            if rx.search(line):
-                risk_hits.append(rx.pattern)
-    risk_level = 80 if any(("죽고" in h) or ("자해" in h) for h in risk_hits) else (60 if risk_hits else 0)
-
-    # 2) 주제 카운트
-    theme_counts = {}
-    for theme, pats in THEMES.items():
-        theme_counts[theme] = sum(_count_by_regex(line, pats) for line in texts)
-
-    # 3) 감정 카운트
-    emotion_counts = {}
-    for emo, pats in EMOTIONS.items():
-        emotion_counts[emo] = sum(_count_by_regex(line, pats) for line in texts)
-
-    # 4) 점수 산출 (간단 규칙 기반)
-    def clamp(x): return max(0, min(100, int(x)))
-
-    dep = 0
-    dep += 20 * bool(emotion_counts["슬픔"])
-    dep += 20 * bool(emotion_counts["무기력"])
-    dep += 10 * min(theme_counts["수면"], 2)
-    dep += 10 * (theme_counts["대인/가족"] > 1)
-    dep += 30 if risk_level >= 60 else 0
-    depression_score = clamp(dep)
-
-    anx = 0
-    anx += 25 * bool(emotion_counts["불안"])
-    anx += 10 * min(theme_counts["건강/신체"], 2)
-    anx += 10 * min(theme_counts["업무/학업"], 2)
-    anx += 20 * bool(emotion_counts["무기력"])
-    anx += 20 if risk_level >= 60 else 0
-    anxiety_score = clamp(anx)
-
-    stress = 0
-    stress += 15 * min(theme_counts["업무/학업"], 2)
-    stress += 15 * min(theme_counts["대인/가족"], 2)
-    stress += 15 * min(theme_counts["금전/생활"], 2)
-    stress += 15 * bool(emotion_counts["분노"])
-    stress += 10 * min(theme_counts["수면"], 2)
-    stress_score = clamp(stress)
+# ---- 단일 패스 매처 ----
+# RISK/THEMES/EMOTIONS 의 모든 패턴을 한 번만 컴파일해 두고, 메시지마다 한 번만 훑는다.
+# 패턴 첫 글자로 색인을 만들어 두면 한 번의 문자 클래스 스캔으로 후보 위치를 찾고,
+# 그 위치에서 해당 글자로 시작하는 패턴만 앵커 매칭(match)하면 된다.
+# (큰 alternation 하나로 합치면 sre 가 위치마다 모든 분기를 되짚어 오히려 느려진다)
+# 색인은 파싱한 패턴이 반복자 없는 리터럴 한 글자로 시작하고 최상위 분기(|)가 없을 때만 쓴다.
+# 그 밖의 패턴(울?적, 초조|두근, [가나] 로 시작 등)은 색인 없이 re.search 로 따로 찾는다.
+try:
+    from re import _parser as _sre_parse  # 3.11+
+except ImportError:
+    import sre_parse as _sre_parse
+
+def _first_literal(pattern: str) -> Optional[str]:
+    """색인에 쓸 첫 글자. 매칭마다 반드시 그 글자로 시작한다고 확신할 수 없으면 None."""
+    parsed = _sre_parse.parse(pattern)
+    if parsed.state.flags & (re.IGNORECASE | re.VERBOSE):
+        return None
+    items = list(parsed)
+    if not items or items[0][0] is not _sre_parse.LITERAL:
+        return None
+    if any(op is _sre_parse.BRANCH for op, _ in items):
+        return None
+    return chr(items[0][1])
+
+def _build_matcher(patterns: Sequence[str]):
+    pattern_ids: Dict[str, int] = {}
+    for p in patterns:
+        pattern_ids.setdefault(p, len(pattern_ids))
+
+    by_first: Dict[str, List[Tuple[int, "re.Pattern[str]"]]] = {}
+    unindexed: List[Tuple[int, "re.Pattern[str]"]] = []
+    for p, pid in pattern_ids.items():
+        first = _first_literal(p)
+        if first is None:
+            unindexed.append((pid, re.compile(p)))
+        else:
+            by_first.setdefault(first, []).append((pid, re.compile(p)))
+
+    trigger = re.compile("[" + "".join(re.escape(c) for c in sorted(by_first)) + "]") if by_first else None
+    return pattern_ids, by_first, unindexed, trigger
+
+def _scan(text: str, by_first, unindexed, trigger) -> Set[int]:
+    hits: Set[int] = set()
+    if trigger is not None:
+        for m in trigger.finditer(text):
+            pos = m.start()
+            for pid, rx in by_first[m.group()]:
+                if pid not in hits and rx.match(text, pos):
+                    hits.add(pid)
+    for pid, rx in unindexed:
+        if rx.search(text):
+            hits.add(pid)
+    return hits
+
+ALL_PATTERNS = RISK_PATTERNS + [p for pats in THEMES.values() for p in pats] + [p for pats in EMOTIONS.values() for p in pats]
+_PATTERN_IDS, _BY_FIRST_CHAR, _UNINDEXED, _TRIGGER = _build_matcher(ALL_PATTERNS)
+
+RISK_IDS = [_PATTERN_IDS[p] for p in RISK_PATTERNS]
+THEME_IDS = {k: [_PATTERN_IDS[p] for p in pats] for k, pats in THEMES.items()}
+EMOTION_IDS = {k: [_PATTERN_IDS[p] for p in pats] for k, pats in EMOTIONS.items()}
+_ANY_EMOTION_IDS = frozenset(pid for ids in EMOTION_IDS.values() for pid in ids)
+
+# 패턴 id → 누적 상태에서 올려야 할 (버킷, 키) 목록. 같은 패턴이 여러 범주에 속할 수 있다.
+_PID_TARGETS: Dict[int, List[Tuple[str, str]]] = {pid: [] for pid in _PATTERN_IDS.values()}
+for _p, _pid in zip(RISK_PATTERNS, RISK_IDS):
+    _PID_TARGETS[_pid].append(("risk_hits", _p))
+for _bucket, _groups in (("theme_counts", THEME_IDS), ("emotion_counts", EMOTION_IDS)):
+    for _key, _ids in _groups.items():
+        for _pid in _ids:
+            _PID_TARGETS[_pid].append((_bucket, _key))
+
+def scan_message(text: str) -> Set[int]:
+    """text 에서 한 번이라도 매칭되는 패턴 id 집합 (패턴별 re.search 결과와 동일)"""
+    return _scan(text, _BY_FIRST_CHAR, _UNINDEXED, _TRIGGER)
+
+# ---- 세션별 누적 상태 ----
+# /chat 턴마다 새 메시지 하나만 접어 넣고(update_analysis_state),
+# /finalize 나 실시간 점수 조회에서는 누적된 카운터로 점수만 계산한다(analysis_result).
+HIGHLIGHT_WINDOW = 5
+
+def new_analysis_state() -> Dict[str, Any]:
+    """JSON 직렬화 가능한 빈 누적 상태"""
+    return {
+        "theme_counts": {k: 0 for k in THEMES},
+        "emotion_counts": {k: 0 for k in EMOTIONS},
+        "risk_hits": [],          # 중복 없이, 처음 감지된 순서대로
+        "recent": [],             # 최근 메시지 [원문, 감정 키워드 포함 여부] (하이라이트 후보)
+        "message_count": 0,
+    }
+
+def update_analysis_state(state: Dict[str, Any], message: str) -> Dict[str, Any]:
+    hits = scan_message(message.lower())
+
+    # 1) 위험 탐지 / 2) 주제 카운트 / 3) 감정 카운트 — 매칭된 패턴만 순회
+    for pid in sorted(hits):
+        for bucket, key in _PID_TARGETS[pid]:
+            if bucket == "risk_hits":
+                if key not in state["risk_hits"]:
+                    state["risk_hits"].append(key)
+            else:
+                state[bucket][key] += 1
+
+    recent = state["recent"]
+    recent.append([message, not _ANY_EMOTION_IDS.isdisjoint(hits)])
+    del recent[:-HIGHLIGHT_WINDOW]
+
+    state["message_count"] += 1
+    return state
+
+# ---- 점수 산출 (가중치 행렬) ----
+# 누적 카운트 → 특징 벡터 → 가중치 행렬 곱 → 감성 모델 부정 비율(neg_ratio, 0~1) 가산 → 소수점 버림 → clamp.
+# 특징 정의와 가중치는 버전이 붙은 JSON 설정(SCORING_WEIGHTS, 기본 scoring_weights.json)에서 읽는다.
+# 여러 대화를 한 행렬로 쌓아 한 번에 채점할 수 있다 (규칙 조정, 예전 대화 A/B 재채점).
+SCORING_WEIGHTS_PATH = os.getenv(
+    "SCORING_WEIGHTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_weights.json"))
+
+# 특징이 읽을 수 있는 원천 값 (카운트 행렬의 열 순서)
+SOURCES = [f"theme:{k}" for k in THEMES] + [f"emotion:{k}" for k in EMOTIONS] + ["risk_level"]
+_FEATURE_OPS = ("value", "any", "cap", "gt", "ge")
+# 읽을 수 있는 설정 형식 버전. 형식을 바꾸면 새 번호를 쓰고 여기에 추가한다 (모르는 버전은 거부)
+SCORING_CONFIG_VERSIONS = (1,)
+
+def risk_level_of(risk_hits: List[str]) -> int:
+    return 80 if any(("죽고" in h) or ("자해" in h) for h in risk_hits) else (60 if risk_hits else 0)
+
+class ScoringEngine:
+    """
+    config = {
+        "version": 1,
+        "clamp": [0, 100],
+        "features": [{"name": ..., "source": SOURCES 중 하나, "op": ..., "arg": ...}],
+        "weights": {점수 이름: {특징 이름: 가중치}},
+        "neg_ratio": {점수 이름: neg_ratio 가 1 일 때의 가산점},
+    }
+    op: value(그대로) | any(0 보다 크면 1) | cap(min(x, arg)) | gt(x > arg 이면 1) | ge(x >= arg 이면 1)
+
+    정수 가중치의 합은 float64 에서 더하는 순서와 상관없이 정확하고, neg_ratio 가산은 행렬 곱 뒤에 따로 더하므로
+    기본 설정의 결과는 예전 if 문 구현(정수 합 + 가산점 → int() → clamp)과 비트 단위로 같다.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.version = config.get("version")
+        if self.version not in SCORING_CONFIG_VERSIONS:
+            raise ValueError(f"unsupported scoring config version {self.version!r} "
+                             f"(supported: {', '.join(map(str, SCORING_CONFIG_VERSIONS))})")
+        self.score_names = list(config["weights"])
+        features = config["features"]
+        self.feature_names = [f["name"] for f in features]
+        for f in features:
+            if f["source"] not in SOURCES:
+                raise ValueError(f"unknown feature source {f['source']!r}")
+            if f["op"] not in _FEATURE_OPS:
+                raise ValueError(f"unknown feature op {f['op']!r}")
+        self._src = np.array([SOURCES.index(f["source"]) for f in features], dtype=np.intp)
+        # op 를 배열 세 개로 펼쳐 두면 특징 계산이 연산 몇 번으로 끝난다
+        #   지표형(any/gt/ge): (x > gt) | (x >= ge),  값형(value/cap): min(x, cap)
+        inf = np.inf
+        self._indicator = np.array([f["op"] in ("any", "gt", "ge") for f in features])
+        self._gt = np.array([0.0 if f["op"] == "any" else float(f["arg"]) if f["op"] == "gt" else inf for f in features])
+        self._ge = np.array([float(f["arg"]) if f["op"] == "ge" else inf for f in features])
+        self._cap = np.array([float(f["arg"]) if f["op"] == "cap" else inf for f in features])
+
+        # 가중치 키가 특징 목록에 없으면(오타 등) 어느 이름이 틀렸는지 알 수 있게 막는다
+        used = {name for score in self.score_names for name in config["weights"][score]}
+        unknown = sorted(used - set(self.feature_names))
+        if unknown:
+            missing = [name for name in self.feature_names if name not in used]
+            raise ValueError(f"scoring config version {self.version!r}: unknown feature names in weights "
+                             f"{unknown} (features not used by any score: {missing})")
+        self.weights = np.zeros((len(features), len(self.score_names)))  # (특징, 점수)
+        for j, score in enumerate(self.score_names):
+            for name, w in config["weights"][score].items():
+                self.weights[self.feature_names.index(name), j] = w
+        neg = config.get("neg_ratio", {})
+        self.neg_weights = np.array([float(neg.get(score, 0)) for score in self.score_names])
+        self.lo, self.hi = config.get("clamp", [0, 100])
+
+    @classmethod
+    def from_file(cls, path: str) -> "ScoringEngine":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def features(self, counts: np.ndarray) -> np.ndarray:
+        """(대화 수, len(SOURCES)) 카운트 행렬 → (대화 수, 특징 수) 특징 행렬"""
+        x = counts[:, self._src]
+        return np.where(self._indicator, (x > self._gt) | (x >= self._ge), np.minimum(x, self._cap))
+
+    def score(self, counts: np.ndarray, neg_ratios: Optional[Sequence[Optional[float]]] = None) -> np.ndarray:
+        """(대화 수, 점수 수) 정수 점수. neg_ratios 의 None 은 가산하지 않는다."""
+        total = self.features(counts) @ self.weights
+        if neg_ratios is not None:
+            bonus = np.array(neg_ratios, dtype=np.float64)[:, None] * self.neg_weights  # None → nan
+            total = np.where(np.isnan(bonus), total, total + bonus)
+        return np.clip(np.trunc(total), self.lo, self.hi).astype(np.int64)
+
+def load_scoring_engine(path: str = SCORING_WEIGHTS_PATH) -> ScoringEngine:
+    return ScoringEngine.from_file(path)
+
+SCORING = load_scoring_engine()
+
+def count_row(state: Dict[str, Any]) -> List[float]:
+    """누적 상태 → SOURCES 순서의 카운트 목록"""
+    return ([state["theme_counts"][k] for k in THEMES]
+            + [state["emotion_counts"][k] for k in EMOTIONS]
+            + [risk_level_of(state["risk_hits"])])
+
+def count_matrix(states: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """누적 상태 목록 → (대화 수, len(SOURCES)) 카운트 행렬"""
+    return np.array([count_row(state) for state in states], dtype=np.float64).reshape(len(states), len(SOURCES))
+
+def _result(state: Dict[str, Any], scores: Dict[str, int]) -> Dict[str, Any]:
+    theme_counts = dict(state["theme_counts"])
+    emotion_counts = dict(state["emotion_counts"])
+    risk_hits = state["risk_hits"]
+    risk_level = risk_level_of(risk_hits)
 
     # 5) 상위 주제
     top_themes = sorted(theme_counts.items(), key=lambda x: x[1], reverse=True)
     top_themes = [t for t, c in top_themes if c > 0][:3]
 
     # 6) 하이라이트 (최근 메시지 중 키워드 포함 0~2개)
-    highlights = []
-    for m in messages[-5:]:
-        for emo_list in EMOTIONS.values():
-            if any(re.search(kw, m) for kw in emo_list):
-                highlights.append(m)
-                break
-        if len(highlights) >= 2:
-            break
+    highlights = [m for m, has_emotion in state["recent"] if has_emotion][:2]
 
     return {
-        "scores": {
-            "depression": depression_score,
-            "anxiety": anxiety_score,
-            "stress": stress_score,
-        },
+        "scores": scores,
         "risk": {
             "level": risk_level,
-            "hits": list(set(risk_hits)),
+            "hits": list(risk_hits),
             "need_immediate_help": risk_level >= 80,
         },
         "themes": theme_counts,
@@ -120,3 +278,34 @@ def analyze_messages(messages: List[str]) -> Dict[str, Any]:
         "emotions": emotion_counts,
         "highlights": highlights,
     }
+
+def analysis_result_batch(states: Sequence[Dict[str, Any]], neg_ratios: Optional[Sequence[Optional[float]]] = None,
+                          engine: Optional[ScoringEngine] = None) -> List[Dict[str, Any]]:
+    """여러 세션의 누적 상태를 한 번의 행렬 연산으로 채점한다."""
+    if not states:
+        return []
+    engine = engine or SCORING
+    scores = engine.score(count_matrix(states), neg_ratios)
+    return [_result(state, dict(zip(engine.score_names, map(int, row)))) for state, row in zip(states, scores)]
+
+def analysis_result(state: Dict[str, Any], neg_ratio: Optional[float] = None,
+                    engine: Optional[ScoringEngine] = None) -> Dict[str, Any]:
+    # 대화 하나도 analysis_result_batch 와 같은 score() 로 채점한다 (채점 구현을 하나로 유지)
+    return analysis_result_batch([state], [neg_ratio], engine)[0]
+
+def analyze_messages(messages: List[str], neg_ratio: Optional[float] = None) -> Dict[str, Any]:
+    state = new_analysis_state()
+    for m in messages:
+        update_analysis_state(state, m)
+    return analysis_result(state, neg_ratio)
+
+def analyze_batch(conversations: Sequence[List[str]], neg_ratios: Optional[Sequence[Optional[float]]] = None,
+                  engine: Optional[ScoringEngine] = None) -> List[Dict[str, Any]]:
+    """대화(사용자 발화 목록) 여러 개를 분석하고 점수는 한 번에 계산한다."""
+    states = []
+    for messages in conversations:
+        state = new_analysis_state()
+        for m in messages:
+            update_analysis_state(state, m)
+        states.append(state)
+    return analysis_result_batch(states, neg_ratios, engine)
@@ -1,15 +1,23 @@
 # app.py  — LM Studio(OpenAI 호환 API) 버전
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import os
 import re
+import time
+import unicodedata
 import uuid
-import requests
-from typing import Dict, List
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
 
+import anyio
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
 # -----------------------------------------------------------------------------
@@ -24,10 +32,51 @@ API_ORIGINS = [o.strip() for o in _front.split(",") if o.strip()]
 if os.getenv("VERCEL"):
     API_ORIGINS = ["*"]
 
-# LM Studio(OpenAI 호환) 서버 설정
+# LM Studio(OpenAI 호환) 서버 설정 — 쉼표로 여러 서버를 주면 나눠 보낸다
 OPENAI_BASE = os.getenv("OPENAI_BASE", "http://localhost:1234/v1")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "Qwen2.5-7B-Instruct")
 
+try:
+    from backend.llm_router import router_from_env  # Vercel 배포용
+    from backend.llm_dispatch import PRIORITY_CHAT, PRIORITY_SUMMARY, DispatchOverloaded, dispatcher_from_env
+    from backend.llm_guard import CLOSED, HALF_OPEN, OPEN, CircuitOpen, adaptive_timeout_from_env, breaker_from_env
+    from backend.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+except ModuleNotFoundError:
+    from llm_router import router_from_env  # 로컬 개발용
+    from llm_dispatch import PRIORITY_CHAT, PRIORITY_SUMMARY, DispatchOverloaded, dispatcher_from_env
+    from llm_guard import CLOSED, HALF_OPEN, OPEN, CircuitOpen, adaptive_timeout_from_env, breaker_from_env
+    from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+
+# 모든 세션의 LLM 호출을 웨이브 단위로 투입 (동시 실행 상한, /chat 우선)
+DISPATCH = dispatcher_from_env()
+# LLM 서버가 멈추면 연속 실패 후 차단하고 대체 응답을 바로 돌려준다 (reset 후 시험 호출 하나로 복구 확인)
+LLM_BREAKER = breaker_from_env()
+
+# 요청 단계별 지연 / LLM 토큰 수 (/metrics, Prometheus 형식)
+# 타이머 하나가 perf_counter 두 번 + 이분 탐색 한 번이라 운영 중에도 켜 둔다
+STAGE_SECONDS = REGISTRY.histogram(
+    "rapport_stage_seconds", "Time spent in each stage of a request handler.", ("endpoint", "stage"))
+REQUEST_SECONDS = REGISTRY.histogram(
+    "rapport_request_seconds", "End-to-end handler time.", ("endpoint",))
+LLM_SECONDS = REGISTRY.histogram(
+    "rapport_llm_seconds", "LLM call time, split into dispatcher queue wait and server request.", ("purpose", "phase"))
+LLM_TOKENS = REGISTRY.counter(
+    "rapport_llm_tokens_total", "Tokens reported by the LLM server (or counted locally when a stream has no usage).",
+    ("purpose", "kind"))
+LLM_PURPOSE = {PRIORITY_CHAT: "chat", PRIORITY_SUMMARY: "summary"}
+# 최근 생성 시간의 p95 에 맞춰 줄어드는 타임아웃 (호출부의 45초/30초는 상한)
+# 스트림은 타임아웃이 조각마다 걸리므로 첫 조각까지의 시간으로 따로 잡는다 ("chat_stream")
+LLM_TIMEOUTS = {purpose: adaptive_timeout_from_env() for purpose in LLM_PURPOSE.values()}
+LLM_TIMEOUTS["chat_stream"] = adaptive_timeout_from_env()
+LLM_ENDPOINT_SECONDS = REGISTRY.histogram(
+    "rapport_llm_endpoint_seconds", "LLM server request time per endpoint.", ("endpoint", "outcome"))
+
+# 서버별 keep-alive 커넥션 풀 + 처리 중 요청이 가장 적은 서버로 보내는 라우터 (앱 수명주기 동안 재사용)
+LLM = router_from_env(
+    OPENAI_BASE,
+    observer=lambda url, seconds, ok: LLM_ENDPOINT_SECONDS.observe(seconds, url, "ok" if ok else "error"),
+)
+
 # -----------------------------------------------------------------------------
 # 시스템 프롬프트 (한국어 톤 + 간결한 진행)
 # -----------------------------------------------------------------------------
@@ -93,7 +142,43 @@ SYSTEM_PROMPT = """당신은 '라포'라는 이름의 전문 심리상담 사전
 # -----------------------------------------------------------------------------
 # FastAPI 설정
 # -----------------------------------------------------------------------------
-app = FastAPI(title="Rapport MVP API (LM Studio)")
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+
+async def _sweep_sessions_forever():
+    # 요청이 없는 동안에도 방치된 세션이 TTL 이 지나면 정리되도록 주기적으로 청소
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL)
+        try:
+            await SESSIONS.asweep()
+            await REPORT_JOBS.store.asweep()
+        except Exception as e:
+            print("Session sweep error:", e)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    LLM.start()
+    DISPATCH.start()
+    if SENTIMENT is not None:
+        SENTIMENT.start()  # 모델은 백그라운드 스레드에서 로드 (첫 요청을 막지 않음)
+    if REPORT_ASYNC:
+        REPORT_JOBS.start()
+    sweeper = asyncio.create_task(_sweep_sessions_forever())
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        for task in list(_SUMMARY_TASKS.values()):
+            task.cancel()
+        if SENTIMENT is not None:
+            SENTIMENT.stop()
+        await REPORT_JOBS.close()
+        await DISPATCH.close()
+        await LLM.close()
+
+
+app = FastAPI(title="Rapport MVP API (LM Studio)", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=API_ORIGINS,
@@ -103,10 +188,45 @@ app.add_middleware(
 )
 
 # -----------------------------------------------------------------------------
-# 세션 저장소(메모리)
+# 세션 저장소 (SESSION_BACKEND=memory | sqlite)
 # -----------------------------------------------------------------------------
-# SESSIONS[sid] = {"messages": [{"role":"user"|"assistant","content":"..."}], "region": "..."}
-SESSIONS: Dict[str, Dict] = {}
+# sess = {"messages": [{"role":"user"|"assistant","content":"...", "tokens": 토큰 수(처음 프롬프트에 넣을 때 계산)}],
+#         "region": "...",
+#         "analysis": analyzer 누적 상태(new_analysis_state),
+#         "replies": [[멱등 키, assistant 응답], ...] 최근 CHAT_REPLAY_WINDOW 개 (재전송된 /chat 에 그대로 돌려줌)}
+# 세션을 수정한 뒤에는 바꾼 필드만 SESSIONS.update() 로 다시 저장한다 (sqlite 백엔드는 복사본을 돌려줌).
+# async 처리기에서는 aget_session() / SESSIONS.a*() 를 쓴다 (sqlite 잠금 대기가 이벤트 루프를 막지 않도록).
+# /chat 처리기는 CHAT_SESSION_FIELDS 만 save_chat_fields() 로 반영한다: summary / summary_upto 는
+# 백그라운드 롤링 요약이 따로 쓰므로, LLM 호출 전에 읽어 둔 복사본 전체로 덮으면 요약이 지워진다.
+try:
+    from backend.session_store import store_from_env  # Vercel 배포용
+    from backend.ttl_cache import TTLCache
+except ModuleNotFoundError:
+    from session_store import store_from_env  # 로컬 개발용
+    from ttl_cache import TTLCache
+
+SESSIONS = store_from_env()
+
+
+def get_session(sid: str) -> Dict:
+    sess = SESSIONS.get(sid)
+    if sess is None:
+        raise HTTPException(status_code=404, detail="Invalid session.")
+    return sess
+
+
+async def aget_session(sid: str) -> Dict:
+    sess = await SESSIONS.aget(sid)
+    if sess is None:
+        raise HTTPException(status_code=404, detail="Invalid session.")
+    return sess
+
+
+CHAT_SESSION_FIELDS = ("messages", "analysis", "replies")
+
+
+async def save_chat_fields(sid: str, sess: Dict) -> None:
+    await SESSIONS.aupdate(sid, {f: sess[f] for f in CHAT_SESSION_FIELDS if f in sess})
 
 # -----------------------------------------------------------------------------
 # 스키마
@@ -124,6 +244,7 @@ class CreateSessionRes(BaseModel):
 class ChatReq(BaseModel):
     session_id: str
     text: str
+    idempotency_key: str | None = None  # Idempotency-Key 헤더로 보내도 된다
 
 class ChatRes(BaseModel):
     assistant: str
@@ -135,45 +256,63 @@ class FinalizeReq(BaseModel):
 # -----------------------------------------------------------------------------
 # PII 마스킹(보수적)
 # -----------------------------------------------------------------------------
-PHONE_RE = re.compile(r"(01[016789]|02|0[3-9]\d)-?\d{3,4}-?\d{4}")
-EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-# 이름은 '님/씨' 호칭이 붙은 경우만 치환
-NAME_RE  = re.compile(r'(?<![가-힣])([가-힣]{2,4})(님|씨)(?=\s|$)')
+try:
+    from backend.pii import PII_MAX_INPUT_CHARS, PiiInputTooLarge, pii_scan  # Vercel 배포용
+except ModuleNotFoundError:
+    from pii import PII_MAX_INPUT_CHARS, PiiInputTooLarge, pii_scan  # 로컬 개발용
+
+PII_MASKED = REGISTRY.counter("rapport_pii_masked_total", "PII placeholders inserted into user messages.", ("kind",))
 
-def pii_mask(text: str) -> str:
-    masked = PHONE_RE.sub("<PHONE>", text)
-    masked = EMAIL_RE.sub("<EMAIL>", masked)
-    masked = NAME_RE.sub("<NAME>", masked)
-    return masked
+
+def mask_user_text(text: str) -> str:
+    """사용자 발화 마스킹. PII_MAX_INPUT_CHARS 를 넘는 입력은 413."""
+    try:
+        scan = pii_scan(text, max_chars=PII_MAX_INPUT_CHARS)
+    except PiiInputTooLarge as e:
+        raise HTTPException(status_code=413, detail=f"Message too long (max {e.max_chars} characters).")
+    for span in scan.spans:
+        PII_MASKED.inc(1, span.kind)
+    return scan.text
 
 
 # -----------------------------------------------------------------------------
 # 응답 품질 검증
 # -----------------------------------------------------------------------------
-def validate_response(response: str) -> str:
-    """응답 품질을 검증하고 필요시 수정"""
-
+# 금지된 패턴 (하나의 정규식으로 미리 컴파일)
+FORBIDDEN_PATTERNS = [
+    r'추천합니다',
+    r'조언드리자면',
+    r'해결방법',
+    r'진단',
+    r'치료',
+    r'약물',
+    r'의사',
+    r'병원',
+    r'[1-9]\.',  # 번호 목록
+    r'[-*•]',    # 불릿 포인트
+]
+FORBIDDEN_RE = re.compile("|".join(FORBIDDEN_PATTERNS))
+# 스트리밍에서 아직 보내지 않고 붙잡아 두는 끝부분 글자 수. 반복자가 없는 패턴은 원문 길이보다 긴 매치가 없으므로
+# 이만큼 남겨 두면 조각 경계에 걸친 금지 패턴의 앞부분도 클라이언트에 나가지 않는다.
+FORBIDDEN_HOLDBACK = max(len(p) for p in FORBIDDEN_PATTERNS)
+
+def check_response(response: str) -> str | None:
+    """대체 응답이 필요한 이유("short" | "forbidden"), 통과하면 None"""
     # 기본 품질 체크
     if len(response) < 10:
-        return get_fallback_response("short")
+        return "short"
 
     # 금지된 패턴 체크
-    forbidden_patterns = [
-        r'추천합니다',
-        r'조언드리자면',
-        r'해결방법',
-        r'진단',
-        r'치료',
-        r'약물',
-        r'의사',
-        r'병원',
-        r'[1-9]\.',  # 번호 목록
-        r'[-*•]',    # 불릿 포인트
-    ]
-
-    for pattern in forbidden_patterns:
-        if re.search(pattern, response):
-            return get_fallback_response("forbidden")
+    if FORBIDDEN_RE.search(response):
+        return "forbidden"
+
+    return None
+
+def validate_response(response: str) -> str:
+    """응답 품질을 검증하고 필요시 수정"""
+    reason = check_response(response)
+    if reason:
+        return get_fallback_response(reason)
 
     # 문장 수 체크
     sentences = [s.strip() for s in response.split('.') if s.strip()]
@@ -196,149 +335,647 @@ def get_fallback_response(reason: str) -> str:
     fallbacks = {
         "short": "말씀해 주셔서 감사합니다. 지금 상황에 대해 좀 더 자세히 이야기해 주실 수 있을까요?",
         "forbidden": "힘든 상황이시겠어요. 현재 가장 어려운 부분이 무엇인지 말씀해 주실 수 있나요?",
-        "generic": "이해합니다. 요즘 어떤 일상생활에서 가장 힘든 점이 있으신지 궁금해요."
+        "generic": "이해합니다. 요즘 어떤 일상생활에서 가장 힘든 점이 있으신지 궁금해요.",
+        "llm_error": "말씀해 주셔서 감사합니다. 지금 느끼고 계신 감정에 대해 좀 더 자세히 이야기해 주실 수 있을까요?",
     }
     return fallbacks.get(reason, fallbacks["generic"])
 
+# 응답/대체 응답 카운터 (/stats 로 노출)
+RESPONSE_STATS: Dict[str, int] = {
+    "responses": 0,            # 사용자에게 돌려준 응답 수
+    "candidates": 0,           # 검증한 후보 수
+    "rejected_short": 0,       # 검증에서 떨어진 후보 수
+    "rejected_forbidden": 0,
+    "fallback_short": 0,       # 대체 응답으로 끝난 응답 수 (이유별)
+    "fallback_forbidden": 0,
+    "fallback_llm_error": 0,
+    "fallback_empty": 0,         # 서버가 후보를 하나도 돌려주지 않음 (choices 가 빔)
+    "fallback_overloaded": 0,    # 디스패처 대기 시한 초과
+    "fallback_circuit_open": 0,  # 서킷 브레이커 차단 중
+}
+
+def record_response(fallback_reason: str | None = None, rejected: Iterable[str] = (), candidates: int = 0) -> None:
+    RESPONSE_STATS["responses"] += 1
+    RESPONSE_STATS["candidates"] += candidates
+    for reason in rejected:
+        RESPONSE_STATS[f"rejected_{reason}"] += 1
+    if fallback_reason:
+        RESPONSE_STATS[f"fallback_{fallback_reason}"] += 1
+
+def response_stats() -> Dict[str, float]:
+    fallbacks = sum(v for k, v in RESPONSE_STATS.items() if k.startswith("fallback_"))
+    return {**RESPONSE_STATS, "fallback_rate": fallbacks / max(1, RESPONSE_STATS["responses"])}
+
 # -----------------------------------------------------------------------------
 # LLM 호출 (LM Studio OpenAI 호환 서버)
 # -----------------------------------------------------------------------------
-def llm_reply(history: List[Dict[str, str]], user_profile: Dict[str, str] = None) -> str:
+try:
+    from backend.context_window import context_from_env  # Vercel 배포용
+except ModuleNotFoundError:
+    from context_window import context_from_env  # 로컬 개발용
+
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", "256"))
+# 프롬프트 토큰 예산 안에서 최근 대화부터 채운다 (긴 붙여넣기에도 프리필 시간이 일정하도록)
+CONTEXT = context_from_env()
+
+
+@lru_cache(maxsize=PROMPT_CACHE_SIZE)
+def build_system_prompt(gender: str = "", age_group: str = "", occupation: str = "") -> str:
+    """
+    (성별, 연령대, 직업) 별 시스템 프롬프트를 한 번만 만들어 재사용한다.
+    긴 정적 지침과 예시(SYSTEM_PROMPT)를 항상 맨 앞에 그대로 두고 프로필 블록은 뒤에만 붙여서,
+    모든 세션이 바이트 단위로 같은 접두부를 공유하도록 한다 (LLM 서버의 프롬프트/KV 접두 캐시 재사용).
+    """
+    # 사용자 프로필 정보를 시스템 프롬프트에 추가
+    profile_context = "\n\n## 내담자 배경 정보"
+    if gender:
+        profile_context += f"\n- 성별: {gender}"
+    if age_group:
+        profile_context += f"\n- 연령대: {age_group}"
+    if occupation:
+        profile_context += f"\n- 직업: {occupation}"
+    profile_context += "\n\n위 배경 정보를 고려하여 내담자의 상황을 더 깊이 이해하고 적절한 질문을 해주세요."
+    return SYSTEM_PROMPT + profile_context
+
+
+def build_chat_messages(history: List[Dict[str, str]], user_profile: Dict[str, str] = None) -> List[Dict[str, str]]:
     """
     history: [{"role":"user"|"assistant","content":"..."}]
     user_profile: {"gender": "...", "ageGroup": "...", "occupation": "..."}
+    LLM_PROMPT_TOKENS 예산 안에 들어가는 최근 대화만 담는다 (history 메시지에 토큰 수를 기록해 둠).
     """
-    # 사용자 프로필 정보를 시스템 프롬프트에 추가
     system_prompt = SYSTEM_PROMPT
     if user_profile:
-        profile_context = "\n\n## 내담자 배경 정보"
-        if user_profile.get("gender"):
-            profile_context += f"\n- 성별: {user_profile['gender']}"
-        if user_profile.get("ageGroup"):
-            profile_context += f"\n- 연령대: {user_profile['ageGroup']}"
-        if user_profile.get("occupation"):
-            profile_context += f"\n- 직업: {user_profile['occupation']}"
-        profile_context += "\n\n위 배경 정보를 고려하여 내담자의 상황을 더 깊이 이해하고 적절한 질문을 해주세요."
-        system_prompt += profile_context
-
-    messages = [{"role": "system", "content": system_prompt}]
-    messages += history[-6:]  # 최근 6턴으로 줄여서 집중도 향상
-
-    try:
-        r = requests.post(
-            f"{OPENAI_BASE}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": OPENAI_MODEL,
-                "messages": messages,
-                "temperature": 0.3,  # 더 일관된 응답을 위해 낮춤
-                "top_p": 0.8,       # 더 집중된 응답
-                "max_tokens": 150,  # 간결한 응답 유도
-                "frequency_penalty": 0.3,  # 반복 방지
-                "presence_penalty": 0.1,   # 새로운 주제 유도
-            },
-            timeout=45,
+        system_prompt = build_system_prompt(
+            (user_profile.get("gender") or "").strip(),
+            (user_profile.get("ageGroup") or "").strip(),
+            (user_profile.get("occupation") or "").strip(),
         )
-        r.raise_for_status()
-        response = r.json()["choices"][0]["message"]["content"].strip()
 
-        # 응답 품질 검증 및 수정
-        response = validate_response(response)
+    return CONTEXT.build(system_prompt, history)
 
-        return response
-    except Exception as e:
-        print("LLM error:", e)
-        return "말씀해 주셔서 감사합니다. 지금 느끼고 계신 감정에 대해 좀 더 자세히 이야기해 주실 수 있을까요?"
+
+def chat_payload(messages: List[Dict[str, str]]) -> Dict:
+    return {
+        "model": OPENAI_MODEL,
+        "messages": messages,
+        "temperature": 0.3,  # 더 일관된 응답을 위해 낮춤
+        "top_p": 0.8,       # 더 집중된 응답
+        "max_tokens": 150,  # 간결한 응답 유도
+        "frequency_penalty": 0.3,  # 반복 방지
+        "presence_penalty": 0.1,   # 새로운 주제 유도
+    }
+
+
+def record_llm_usage(purpose: str, data: Dict) -> None:
+    usage = data.get("usage") or {}
+    for kind in ("prompt", "completion"):
+        n = usage.get(f"{kind}_tokens")
+        if n:
+            LLM_TOKENS.inc(n, purpose, kind)
+
+
+def record_stream_usage(purpose: str, usage: Dict, messages: List[Dict[str, str]], text: str) -> None:
+    """스트림 끝의 usage 블록을 쓰고, 서버가 보내지 않았으면 프롬프트 창과 같은 토크나이저로 센다."""
+    if usage:
+        record_llm_usage(purpose, {"usage": usage})
+        return
+    LLM_TOKENS.inc(CONTEXT.count_messages(messages), purpose, "prompt")
+    if text:
+        LLM_TOKENS.inc(CONTEXT.counter.count(text), purpose, "completion")
+
+
+async def llm_chat_completion(payload: Dict, timeout: float, priority: int = PRIORITY_CHAT,
+                              session_id: str | None = None) -> Dict:
+    """
+    디스패처에서 투입 차례를 받은 뒤 LLM 서버에 요청.
+    서킷이 열려 있으면 CircuitOpen, 대기열이 넘치거나 대기 시한을 넘기면 DispatchOverloaded.
+    session_id: LLM_STICKY_SESSIONS=1 일 때 같은 세션을 같은 서버로 보내는 키
+    """
+    purpose = LLM_PURPOSE[priority]
+    t0 = time.perf_counter()
+    with LLM_BREAKER.guard():
+        async with DISPATCH.slot(priority):
+            LLM_SECONDS.observe(time.perf_counter() - t0, purpose, "queue")
+            with LLM_SECONDS.time(purpose, "request"), LLM_TIMEOUTS[purpose].track(timeout) as limit:
+                data = await LLM.chat_completion(payload, timeout=limit, session_key=session_id)
+    record_llm_usage(purpose, data)
+    return data
+
+
+def llm_failure_reason(e: Exception) -> str:
+    if isinstance(e, CircuitOpen):
+        return "circuit_open"
+    if isinstance(e, DispatchOverloaded):
+        return "overloaded"
+    return "llm_error"
+
+
+# Best-of-N: 후보 N개를 받아 검증을 통과한 첫 후보를 쓰고, 모두 떨어질 때만 대체 응답
+#   LLM_CANDIDATES_MODE=n        → 한 요청에 "n": N (서버가 n 을 무시하면 받은 후보만 검증)
+#   LLM_CANDIDATES_MODE=parallel → N개 요청을 동시에 보내 먼저 도착해 통과한 후보를 쓰고 나머지는 취소
+LLM_CANDIDATES = max(1, int(os.getenv("LLM_CANDIDATES", "1")))
+LLM_CANDIDATES_MODE = os.getenv("LLM_CANDIDATES_MODE", "n").lower()
+
+
+def _choice_text(choice: Dict) -> str:
+    return (choice.get("message") or {}).get("content", "").strip()
+
+
+async def _best_of_n(payload: Dict, session_id: str | None = None) -> Tuple[str, bool]:
+    """(응답, 검증 통과 여부) — 모든 후보가 떨어지면 (대체 응답, False)"""
+    rejected: List[str] = []
+    candidates = 0
+
+    if LLM_CANDIDATES > 1 and LLM_CANDIDATES_MODE == "parallel":
+        tasks = [asyncio.ensure_future(llm_chat_completion(payload, timeout=45, session_id=session_id)) for _ in range(LLM_CANDIDATES)]
+        errors: List[Exception] = []
+        try:
+            for fut in asyncio.as_completed(tasks):
+                try:
+                    data = await fut
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                if not data.get("choices"):
+                    continue
+                text = _choice_text(data["choices"][0])
+                candidates += 1
+                with STAGE_SECONDS.time("chat", "validate"):
+                    reason = check_response(text)
+                    final = validate_response(text) if reason is None else None
+                if reason is None:
+                    record_response(rejected=rejected, candidates=candidates)
+                    return final, True
+                rejected.append(reason)
+        finally:
+            for t in tasks:
+                t.cancel()
+            # 실패했지만 읽지 않은 작업의 예외를 거둬 "Task exception was never retrieved" 경고를 막는다
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if not candidates and errors:
+            raise errors[0]
+    else:
+        if LLM_CANDIDATES > 1:
+            payload = {**payload, "n": LLM_CANDIDATES}
+        data = await llm_chat_completion(payload, timeout=45, session_id=session_id)
+        for choice in data.get("choices") or []:
+            text = _choice_text(choice)
+            candidates += 1
+            with STAGE_SECONDS.time("chat", "validate"):
+                reason = check_response(text)
+                final = validate_response(text) if reason is None else None
+            if reason is None:
+                record_response(rejected=rejected, candidates=candidates)
+                return final, True
+            rejected.append(reason)
+
+    # 후보가 하나도 없었으면(choices 가 빔) "empty" 로 센다
+    reason = rejected[0] if rejected else "empty"
+    record_response(fallback_reason=reason, rejected=rejected, candidates=candidates)
+    return get_fallback_response(reason), False
+
+
+# -----------------------------------------------------------------------------
+# 응답 캐시 (초반 턴, 선택: RESPONSE_CACHE=1)
+# -----------------------------------------------------------------------------
+# "요즘 너무 우울해요" 처럼 거의 같은 첫 발화에는 같은 검증된 응답을 재사용해 LLM 생성을 아낀다.
+# 키: (정규화한 마스킹 발화의 해시, 프로필, 이전 히스토리 길이). 검증을 통과한 응답만 저장한다.
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "0") == "1"
+RESPONSE_CACHE_MAX_TURN = int(os.getenv("RESPONSE_CACHE_MAX_TURN", "1"))  # 이 번째 사용자 턴까지만
+RESPONSE_CACHE = TTLCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    idle_ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    touch_on_get=False,  # 저장 시점 기준 TTL
+)
+
+# NFKC 후 비교하므로 패턴도 NFKC 로 맞춘다 (ㅠㅜ 같은 호환 자모가 조합형 자모로 바뀜)
+_CACHE_NORMALIZE_RE = re.compile(unicodedata.normalize("NFKC", r"[\s.,!?~ㅠㅜ]+"))
 
 
-def generate_conversation_summary(messages: List[Dict[str, str]]) -> str:
+def response_cache_key(history: List[Dict[str, str]], user_profile: Dict[str, str] | None) -> str | None:
+    """history 의 마지막이 이번 사용자 발화. 캐시 대상이 아니면 None."""
+    if not RESPONSE_CACHE_ENABLED or not history or history[-1]["role"] != "user":
+        return None
+    prior = len(history) - 1
+    if prior // 2 + 1 > RESPONSE_CACHE_MAX_TURN:
+        return None
+    text = _CACHE_NORMALIZE_RE.sub(" ", unicodedata.normalize("NFKC", history[-1]["content"])).strip().lower()
+    if not text:
+        return None
+    profile = user_profile or {}
+    raw = "\x1f".join([text, profile.get("gender", ""), profile.get("ageGroup", ""), profile.get("occupation", ""), str(prior)])
+    # 발화 원문이 세션 밖에 남지 않도록 해시만 키로 쓴다
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def response_cache_stats() -> Dict:
+    s = RESPONSE_CACHE.stats()
+    lookups = s["hits"] + s["misses"]
+    return {**s, "enabled": RESPONSE_CACHE_ENABLED, "hit_rate": s["hits"] / lookups if lookups else 0.0}
+
+
+async def llm_reply(history: List[Dict[str, str]], user_profile: Dict[str, str] = None,
+                    session_id: str | None = None) -> str:
     """
-    대화 내용을 AI를 사용하여 요약 생성
+    history: [{"role":"user"|"assistant","content":"..."}]
+    user_profile: {"gender": "...", "ageGroup": "...", "occupation": "..."}
+    session_id: 서버 고정(sticky) 라우팅 키
     """
+    cache_key = response_cache_key(history, user_profile)
+    if cache_key is not None:
+        cached = RESPONSE_CACHE.get(cache_key)
+        if cached is not None:
+            record_response()
+            return cached
+
+    with STAGE_SECONDS.time("chat", "prompt"):
+        payload = chat_payload(build_chat_messages(history, user_profile))
+
+    try:
+        # 후보 생성 + 응답 품질 검증 및 수정
+        with STAGE_SECONDS.time("chat", "llm"):
+            response, passed = await _best_of_n(payload, session_id)
+        if passed and cache_key is not None:
+            RESPONSE_CACHE.set(cache_key, response)
+        return response
+    except Exception as e:
+        reason = llm_failure_reason(e)
+        if reason == "llm_error":
+            print("LLM error:", e)
+        record_response(fallback_reason=reason)
+        return get_fallback_response("llm_error")
+
+
+def _conversation_text(messages: List[Dict[str, str]]) -> str:
     # 사용자와 AI의 대화만 추출
     conversation_text = ""
     for msg in messages:
         role = "사용자" if msg["role"] == "user" else "챗봇"
         conversation_text += f"{role}: {msg['content']}\n"
+    return conversation_text
 
-    if not conversation_text.strip():
-        return ""
-
-    summary_prompt = f"""다음은 심리상담 사전 점검 대화입니다. 이 대화를 2-3문장으로 요약해주세요.
 
-대화 내용:
-{conversation_text}
-
-요약할 때 다음 사항을 포함해주세요:
+SUMMARY_GUIDE = """요약할 때 다음 사항을 포함해주세요:
 - 사용자가 호소한 주요 문제나 어려움
 - 대화에서 나타난 주요 감정이나 상태
 - 언급된 구체적인 상황이나 배경
 
 객관적으로 요약해주세요."""
 
+
+async def summarize_messages(messages: List[Dict[str, str]], previous_summary: str = "",
+                             session_id: str | None = None) -> str | None:
+    """
+    messages 를 2-3문장으로 요약. previous_summary 가 있으면 그 요약에 새 대화만 반영해 갱신한다.
+    실패 시 None.
+    """
+    conversation_text = _conversation_text(messages)
+    if not conversation_text.strip():
+        return previous_summary
+
+    if previous_summary:
+        summary_prompt = f"""다음은 심리상담 사전 점검 대화의 지금까지 요약과, 그 뒤에 이어진 대화입니다. 이어진 대화 내용을 반영하여 전체 대화의 요약을 2-3문장으로 갱신해주세요.
+
+지금까지 요약:
+{previous_summary}
+
+이어진 대화 내용:
+{conversation_text}
+
+{SUMMARY_GUIDE}"""
+    else:
+        summary_prompt = f"""다음은 심리상담 사전 점검 대화입니다. 이 대화를 2-3문장으로 요약해주세요.
+
+대화 내용:
+{conversation_text}
+
+{SUMMARY_GUIDE}"""
+
     try:
-        r = requests.post(
-            f"{OPENAI_BASE}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}",
-                "Content-Type": "application/json"
-            },
-            json={
+        data = await llm_chat_completion(
+            {
                 "model": OPENAI_MODEL,
                 "messages": [{"role": "user", "content": summary_prompt}],
                 "temperature": 0.3,
                 "max_tokens": 200,
             },
             timeout=30,
+            priority=PRIORITY_SUMMARY,
+            session_id=session_id,
         )
-        r.raise_for_status()
-        summary = r.json()["choices"][0]["message"]["content"].strip()
+        summary = data["choices"][0]["message"]["content"].strip()
         return summary
     except Exception as e:
         print("Summary generation error:", e)
-        return "대화 요약을 생성하는 중 오류가 발생했습니다."
+        return None
+
+
+SUMMARY_ERROR = "대화 요약을 생성하는 중 오류가 발생했습니다."
+
+
+# -----------------------------------------------------------------------------
+# 롤링 요약 (백그라운드)
+# -----------------------------------------------------------------------------
+# assistant 턴이 끝날 때마다 백그라운드에서 "이전 요약 + 새 턴" 만으로 요약을 갱신해 두고
+# (sess["summary"], sess["summary_upto"]), /finalize 는 남은 델타만 반영한다.
+ROLLING_SUMMARY = os.getenv("ROLLING_SUMMARY", "1") != "0"
+
+_SUMMARY_TASKS: Dict[str, asyncio.Task] = {}
+_SUMMARY_DIRTY: set = set()  # 갱신 도중 새 턴이 들어온 세션
+
+
+async def refresh_rolling_summary(sid: str) -> None:
+    sess = await SESSIONS.aget(sid)
+    if sess is None:
+        return
+    start, upto = sess.get("summary_upto", 0), len(sess["messages"])
+    if start >= upto:
+        return
+
+    summary = await summarize_messages(sess["messages"][start:upto], sess.get("summary", ""), sid)
+    if summary is None:
+        return
+
+    # 그 사이 바뀌었을 수 있는 최신 세션에 요약 필드만 반영
+    sess = await SESSIONS.aget(sid)
+    if sess is None or sess.get("summary_upto", 0) >= upto:
+        return
+    await SESSIONS.aupdate(sid, {"summary": summary, "summary_upto": upto})
+
+
+async def _summary_worker(sid: str) -> None:
+    try:
+        while True:
+            _SUMMARY_DIRTY.discard(sid)
+            await refresh_rolling_summary(sid)
+            if sid not in _SUMMARY_DIRTY:
+                break
+    finally:
+        if _SUMMARY_TASKS.get(sid) is asyncio.current_task():
+            del _SUMMARY_TASKS[sid]
+
+
+def schedule_summary_refresh(sid: str) -> None:
+    if not ROLLING_SUMMARY:
+        return
+    task = _SUMMARY_TASKS.get(sid)
+    if task is not None and not task.done():
+        _SUMMARY_DIRTY.add(sid)  # 진행 중인 작업이 끝나면 한 번 더 돌도록
+        return
+    _SUMMARY_TASKS[sid] = asyncio.create_task(_summary_worker(sid))
+
+
+async def final_summary(sid: str) -> str:
+    """/finalize 용: 진행 중인 갱신을 기다린 뒤 남은 델타만 반영한 요약을 돌려준다."""
+    task = _SUMMARY_TASKS.get(sid)
+    if task is not None:
+        _SUMMARY_DIRTY.discard(sid)
+        try:
+            await task
+        except Exception as e:
+            print("Summary task error:", e)
+
+    await refresh_rolling_summary(sid)
+
+    sess = await SESSIONS.aget(sid)
+    if sess is None:
+        return ""
+    if sess.get("summary"):
+        return sess["summary"]
+    return SUMMARY_ERROR if sess["messages"] else ""
 
 
 # -----------------------------------------------------------------------------
 # 분석 모듈 (룰 기반)
 # -----------------------------------------------------------------------------
 try:
-    from backend.analyzer import analyze_messages  # Vercel 배포용
+    from backend.analyzer import analysis_result, new_analysis_state, update_analysis_state  # Vercel 배포용
 except ModuleNotFoundError:
-    from analyzer import analyze_messages  # 로컬 개발용
+    from analyzer import analysis_result, new_analysis_state, update_analysis_state  # 로컬 개발용
+
+
+# -----------------------------------------------------------------------------
+# 감성 분류 엔진 (선택, SENTIMENT_ENABLED=1)
+# -----------------------------------------------------------------------------
+try:
+    from backend.model_wrap import engine_from_env  # Vercel 배포용
+except ModuleNotFoundError:
+    from model_wrap import engine_from_env  # 로컬 개발용
+
+SENTIMENT = engine_from_env()
+SENTIMENT_TIMEOUT = float(os.getenv("SENTIMENT_TIMEOUT", "2"))
+
+
+# -----------------------------------------------------------------------------
+# 리포트 작업 (/finalize → 백그라운드 워커 → GET /report/{job_id})
+# -----------------------------------------------------------------------------
+try:
+    from backend.report_jobs import DONE as REPORT_DONE, ERROR as REPORT_ERROR, PENDING as REPORT_PENDING  # Vercel 배포용
+    from backend.report_jobs import JobQueueFull, report_jobs_from_env
+except ModuleNotFoundError:
+    from report_jobs import DONE as REPORT_DONE, ERROR as REPORT_ERROR, PENDING as REPORT_PENDING  # 로컬 개발용
+    from report_jobs import JobQueueFull, report_jobs_from_env
+
+REPORT_JOBS = report_jobs_from_env()
+# 백그라운드 워커와 결과 저장소는 오래 떠 있는 백엔드 프로세스가 있어야 의미가 있다.
+# 서버리스(Vercel)에서는 호출이 끝나면 둘 다 사라지므로 /finalize 에서 바로 만들어 200 으로 돌려준다.
+REPORT_ASYNC = os.getenv("REPORT_ASYNC", "0" if os.getenv("VERCEL") else "1") == "1"
+
+# -----------------------------------------------------------------------------
+# /chat 재전송 중복 제거 (멱등 키)
+# -----------------------------------------------------------------------------
+# 네트워크 오류로 클라이언트가 같은 요청을 다시 보내도 기록에 같은 턴이 두 번 쌓이지 않게 한다.
+#  - 이미 답한 키: 세션의 최근 응답 창(sess["replies"])에서 그대로 돌려준다
+#  - 처리 중인 키: 새로 생성하지 않고 먼저 온 요청의 결과를 기다린다 (워커 프로세스 안에서만)
+try:
+    from backend.idempotency import IDEMPOTENCY_KEY_MAX, inflight_from_env, recent_reply, remember_reply  # Vercel 배포용
+except ModuleNotFoundError:
+    from idempotency import IDEMPOTENCY_KEY_MAX, inflight_from_env, recent_reply, remember_reply  # 로컬 개발용
+
+CHAT_INFLIGHT = inflight_from_env()
+CHAT_DUPLICATES = REGISTRY.counter("rapport_chat_duplicates_total",
+                                   "Retried /chat requests answered without a new generation, by outcome.",
+                                   ("outcome",))
+
+
+def idempotency_key(req: ChatReq, header: str | None) -> str | None:
+    key = (header or req.idempotency_key or "").strip()
+    if not key:
+        return None
+    if len(key) > IDEMPOTENCY_KEY_MAX:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key too long (max {IDEMPOTENCY_KEY_MAX} characters).")
+    return key
+
+
+async def duplicate_reply(sid: str, sess: Dict, key: str | None) -> str | None:
+    """이미 답했거나 처리 중인 키면 그 응답, 처음 보는 키(또는 키 없음)면 None."""
+    if key is None:
+        return None
+    reply = recent_reply(sess, key)
+    if reply is not None:
+        CHAT_DUPLICATES.inc(1, "replayed")
+        return reply
+    fut = CHAT_INFLIGHT.get((sid, key))
+    if fut is None:
+        return None
+    CHAT_DUPLICATES.inc(1, "joined")
+    try:
+        return await CHAT_INFLIGHT.wait((sid, key), fut)
+    except asyncio.CancelledError:
+        if not fut.cancelled():
+            raise
+        # 먼저 온 요청이 중간에 취소됐다: 다시 보내게 한다
+        raise HTTPException(status_code=409, detail="The original request was cancelled. Please retry.",
+                            headers={"Retry-After": "1"})
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still in progress.",
+            headers={"Retry-After": "1"},
+        )
 
 
 # -----------------------------------------------------------------------------
 # 엔드포인트
 # -----------------------------------------------------------------------------
+@app.get("/stats")
+def stats():
+    """운영 지표 (세션 점유율/축출 수 등, 대화 내용은 포함하지 않음)"""
+    return {
+        "sessions": SESSIONS.stats(),
+        "responses": response_stats(),
+        "sentiment": SENTIMENT.stats() if SENTIMENT is not None else None,
+        "llm_dispatch": DISPATCH.stats(),
+        "llm_breaker": LLM_BREAKER.stats(),
+        "llm_endpoints": LLM.stats(),
+        "llm_timeouts": {purpose: t.stats() for purpose, t in LLM_TIMEOUTS.items()},
+        "response_cache": response_cache_stats(),
+        "context": CONTEXT.stats(),
+        "reports": REPORT_JOBS.stats(),
+        "chat_in_flight": CHAT_INFLIGHT.stats(),
+    }
+
+
+# 요청 경로에서 따로 세지 않고 노출 시점에 읽는 값들
+REGISTRY.gauge_fn("rapport_active_sessions", "Sessions currently held in the session store.",
+                  lambda: SESSIONS.stats()["active"])
+REGISTRY.gauge_fn("rapport_llm_in_flight", "LLM HTTP requests awaiting a response or streaming.",
+                  lambda: LLM.in_flight)
+REGISTRY.gauge_fn("rapport_llm_endpoint_outstanding", "LLM requests outstanding per endpoint.",
+                  lambda: {(ep.url,): ep.outstanding for ep in LLM.endpoints}, ("endpoint",))
+REGISTRY.gauge_fn("rapport_llm_endpoint_healthy", "1 if the endpoint is in rotation, 0 while ejected.",
+                  lambda: {(s["url"],): int(s["healthy"]) for s in LLM.stats()["endpoints"]}, ("endpoint",))
+REGISTRY.counter_fn("rapport_llm_endpoint_ejections_total", "Times an endpoint was ejected after consecutive failures.",
+                    lambda: {(ep.url,): ep.ejections for ep in LLM.endpoints}, ("endpoint",))
+REGISTRY.gauge_fn("rapport_llm_queued", "LLM calls waiting for a dispatcher slot.",
+                  lambda: DISPATCH.queued)
+REGISTRY.gauge_fn("rapport_llm_breaker_state", "LLM circuit breaker state (0 closed, 1 half-open, 2 open).",
+                  lambda: {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[LLM_BREAKER.state])
+REGISTRY.counter_fn("rapport_llm_shed_total", "LLM calls refused without reaching the server, by reason.",
+                    lambda: {("queue_full",): DISPATCH.rejected, ("queue_timeout",): DISPATCH.timed_out,
+                             ("circuit_open",): LLM_BREAKER.short_circuited},
+                    ("reason",))
+REGISTRY.counter_fn("rapport_context_truncated_total", "Messages cut to fit the prompt token budget.",
+                    lambda: CONTEXT.truncated)
+REGISTRY.gauge_fn("rapport_report_jobs_pending", "Finalize report jobs waiting for a worker.",
+                  lambda: REPORT_JOBS.pending)
+REGISTRY.counter_fn("rapport_report_jobs_total", "Finalize report jobs by outcome.",
+                    lambda: {("completed",): REPORT_JOBS.completed, ("failed",): REPORT_JOBS.failed,
+                             ("rejected",): REPORT_JOBS.rejected},
+                    ("outcome",))
+REGISTRY.counter_fn("rapport_responses_total", "Replies returned to users (including fallbacks).",
+                    lambda: RESPONSE_STATS["responses"])
+REGISTRY.counter_fn("rapport_fallback_responses_total", "Replies replaced by a canned fallback, by reason.",
+                    lambda: {(k[len("fallback_"):],): v for k, v in list(RESPONSE_STATS.items()) if k.startswith("fallback_")},
+                    ("reason",))
+REGISTRY.counter_fn("rapport_rejected_candidates_total", "LLM candidates rejected by validation, by reason.",
+                    lambda: {(k[len("rejected_"):],): v for k, v in list(RESPONSE_STATS.items()) if k.startswith("rejected_")},
+                    ("reason",))
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus 텍스트 형식 지표 (워커 프로세스별 값)"""
+    return Response(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.post("/session", response_model=CreateSessionRes)
 def create_session(req: CreateSessionReq):
     if not req.consent:
         raise HTTPException(status_code=400, detail="Consent required.")
     sid = str(uuid.uuid4())
-    SESSIONS[sid] = {
+    SESSIONS.put(sid, {
         "messages": [],
         "region": (req.region or "").strip(),
         "gender": (req.gender or "").strip(),
         "ageGroup": (req.ageGroup or "").strip(),
-        "occupation": (req.occupation or "").strip()
-    }
+        "occupation": (req.occupation or "").strip(),
+        "analysis": new_analysis_state(),
+        "summary": "",
+        "summary_upto": 0,  # summary 가 반영한 messages 개수
+    })
     return CreateSessionRes(session_id=sid)
 
 
+@app.get("/session/{session_id}/scores")
+def session_scores(session_id: str):
+    """진행 중 세션의 실시간 점수 (재분석 없이 누적 상태에서 계산)"""
+    sess = get_session(session_id)
+    analysis = analysis_result(sess["analysis"])
+    return {
+        "scores": analysis["scores"],
+        "top_issues": analysis["top_themes"],
+        "risk_level": analysis["risk"]["level"],
+        "message_count": sess["analysis"]["message_count"],
+    }
+
+
+def admit_llm_request() -> None:
+    """LLM 대기열이 가득 찼으면 세션을 건드리기 전에 바로 503 + Retry-After 로 돌려보낸다."""
+    try:
+        DISPATCH.check_admission()
+    except DispatchOverloaded as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry shortly.",
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+
+
 @app.post("/chat", response_model=ChatRes)
-def chat(req: ChatReq):
-    if req.session_id not in SESSIONS:
-        raise HTTPException(status_code=404, detail="Invalid session.")
+async def chat(req: ChatReq, idempotency_key_header: str | None = Header(None, alias="Idempotency-Key")):
+    t0 = time.perf_counter()
+    key = idempotency_key(req, idempotency_key_header)
+    with STAGE_SECONDS.time("chat", "store"):
+        sess = await aget_session(req.session_id)
+    # 재전송이면 대기열 검사 없이 먼저 받은 요청의 응답을 돌려준다
+    reply = await duplicate_reply(req.session_id, sess, key)
+    if reply is not None:
+        return ChatRes(assistant=reply)
+    admit_llm_request()
+    if key is None:
+        return await _chat(req, sess, t0)
+    fut = CHAT_INFLIGHT.begin((req.session_id, key))
+    try:
+        res = await _chat(req, sess, t0, key)
+    except BaseException as e:
+        CHAT_INFLIGHT.end((req.session_id, key), fut, error=e)
+        raise
+    CHAT_INFLIGHT.end((req.session_id, key), fut, result=res.assistant)
+    return res
+
 
-    sess = SESSIONS[req.session_id]
-    user_text = pii_mask(req.text)
+async def _chat(req: ChatReq, sess: Dict, t0: float, key: str | None = None) -> ChatRes:
+    with STAGE_SECONDS.time("chat", "pii_mask"):
+        user_text = mask_user_text(req.text)
 
-    # 1) 사용자 메시지 저장
+    # 1) 사용자 메시지 저장 + 분석 상태에 누적
     sess["messages"].append({"role": "user", "content": user_text})
+    with STAGE_SECONDS.time("chat", "analyze"):
+        update_analysis_state(sess["analysis"], user_text)
+    with STAGE_SECONDS.time("chat", "store"):
+        await save_chat_fields(req.session_id, sess)
 
     # 2) 사용자 프로필 정보 추출
     user_profile = {
@@ -347,31 +984,196 @@ def chat(req: ChatReq):
         "occupation": sess.get("occupation", "")
     }
 
-    # 3) LLM 응답 생성
-    assistant_text = llm_reply(sess["messages"], user_profile)
+    # 3) LLM 응답 생성 (prompt / llm / validate 단계는 llm_reply 안에서 잰다)
+    assistant_text = await llm_reply(sess["messages"], user_profile, req.session_id)
 
     # 4) assistant 메시지 저장
     sess["messages"].append({"role": "assistant", "content": assistant_text})
+    if key is not None:
+        remember_reply(sess, key, assistant_text)
+    with STAGE_SECONDS.time("chat", "store"):
+        await save_chat_fields(req.session_id, sess)
+    schedule_summary_refresh(req.session_id)
 
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, "chat")
     return ChatRes(assistant=assistant_text)
 
 
-@app.post("/finalize")
-def finalize(req: FinalizeReq):
-    if req.session_id not in SESSIONS:
-        raise HTTPException(status_code=404, detail="Invalid session.")
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-    sess = SESSIONS[req.session_id]
 
-    # 사용자 발화만 뽑아서 분석
-    user_msgs = [m["content"] for m in sess["messages"] if m["role"] == "user"]
-    # print("DEBUG user_msgs:", user_msgs)  # 필요 시 디버그
+def _sse_reply(assistant_text: str) -> List[str]:
+    """이미 만들어진 응답을 스트림 형식으로 한 번에 보낸다 (token 하나 + done)."""
+    return [_sse("token", {"text": assistant_text}), _sse("done", {"assistant": assistant_text})]
 
-    analysis = analyze_messages(user_msgs)
 
-    # AI를 사용한 대화 요약 생성
-    conversation_summary = generate_conversation_summary(sess["messages"])
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
+
+@app.post("/chat/stream")
+async def chat_stream(req: ChatReq, idempotency_key_header: str | None = Header(None, alias="Idempotency-Key")):
+    """
+    /chat 의 스트리밍 버전(SSE).
+    event: token  → {"text": "..."}  (모델이 생성한 조각)
+    event: done   → {"assistant": "..."}  (validate_response 를 거친 최종 응답)
+    event: error  → {"detail": "..."}  (응답을 시작한 뒤 세션이 사라졌거나 같은 키의 요청이 끝나지 않음)
+    재전송(같은 멱등 키)이면 먼저 받은 요청의 최종 응답을 token 하나 + done 으로 보낸다.
+    """
+    t0 = time.perf_counter()
+    key = idempotency_key(req, idempotency_key_header)
+    with STAGE_SECONDS.time("chat_stream", "store"):
+        sess = await aget_session(req.session_id)
+    reply = await duplicate_reply(req.session_id, sess, key)
+    if reply is not None:
+        return _sse_response(iter(_sse_reply(reply)))
+    with STAGE_SECONDS.time("chat_stream", "pii_mask"):
+        user_text = mask_user_text(req.text)
+    admit_llm_request()
+    # 턴(사용자 메시지 기록, 처리 중 키 등록)은 스트림 본문이 시작된 뒤에 연다:
+    # 본문이 시작되기 전에 클라이언트가 끊으면 event_stream 의 finally 가 돌지 않으므로
+    # 답 없는 사용자 발화나 풀리지 않는 키가 남지 않게 한다.
+    return _sse_response(_chat_stream(req, sess, user_text, t0, key))
+
+
+async def _chat_stream(req: ChatReq, sess: Dict, user_text: str, t0: float, key: str | None = None):
+    sid = req.session_id
+    fut = None
+    if key is not None:
+        # 처리기에서 검사한 뒤 같은 키의 요청이 먼저 시작했거나 끝났을 수 있으므로 최신 세션으로 다시 본다
+        with STAGE_SECONDS.time("chat_stream", "store"):
+            sess = await SESSIONS.aget(sid)
+        if sess is None:
+            yield _sse("error", {"detail": "Invalid session."})
+            return
+        try:
+            reply = await duplicate_reply(sid, sess, key)
+        except HTTPException as e:
+            yield _sse("error", {"detail": e.detail})
+            return
+        if reply is not None:
+            for event in _sse_reply(reply):
+                yield event
+            return
+        fut = CHAT_INFLIGHT.begin((sid, key))
+
+    parts: List[str] = []
+    assistant_text = None
+    try:
+        sess["messages"].append({"role": "user", "content": user_text})
+        with STAGE_SECONDS.time("chat_stream", "analyze"):
+            update_analysis_state(sess["analysis"], user_text)
+        with STAGE_SECONDS.time("chat_stream", "store"):
+            await save_chat_fields(sid, sess)
+
+        user_profile = {
+            "gender": sess.get("gender", ""),
+            "ageGroup": sess.get("ageGroup", ""),
+            "occupation": sess.get("occupation", "")
+        }
+        with STAGE_SECONDS.time("chat_stream", "prompt"):
+            payload = chat_payload(build_chat_messages(sess["messages"], user_profile))
+        cache_key = response_cache_key(sess["messages"], user_profile)
+        cached = RESPONSE_CACHE.get(cache_key) if cache_key is not None else None
+
+        if cached is not None:
+            # 캐시 적중: 생성 없이 한 번에 보낸다
+            record_response()
+            assistant_text = cached
+            yield _sse("token", {"text": cached})
+        else:
+            t_llm = time.perf_counter()
+            with LLM_BREAKER.guard():
+                async with DISPATCH.slot(PRIORITY_CHAT):
+                    t_req = time.perf_counter()
+                    LLM_SECONDS.observe(t_req - t_llm, "chat", "queue")
+                    usage: Dict = {}
+                    # 보내기 전에 모인 글 전체에 금지 패턴 검사를 돌린다. 걸리면 더 보내지 않고 생성을 멈춘다
+                    # (최종본은 done 이벤트의 대체 응답). 짧은 응답 같은 나머지 검증은 끝난 뒤 한 번만 한다.
+                    buf, sent, blocked = "", 0, False
+                    try:
+                        with LLM_TIMEOUTS["chat_stream"].track_stream(45) as (limit, first_chunk):
+                            async for delta in LLM.stream_chat_completion(payload, timeout=limit, session_key=sid,
+                                                                          usage=usage):
+                                if not parts:
+                                    first_chunk()
+                                    STAGE_SECONDS.observe(time.perf_counter() - t0, "chat_stream", "ttft")
+                                parts.append(delta)
+                                buf += delta
+                                if FORBIDDEN_RE.search(buf, max(0, sent - FORBIDDEN_HOLDBACK)):
+                                    blocked = True
+                                    break
+                                safe = len(buf) - FORBIDDEN_HOLDBACK
+                                if safe > sent:
+                                    yield _sse("token", {"text": buf[sent:safe]})
+                                    sent = safe
+                        if not blocked and len(buf) > sent:
+                            yield _sse("token", {"text": buf[sent:]})
+                    finally:
+                        now = time.perf_counter()
+                        LLM_SECONDS.observe(now - t_req, "chat", "request")
+                        STAGE_SECONDS.observe(now - t_llm, "chat_stream", "llm")
+                        record_stream_usage("chat", usage, payload["messages"], "".join(parts))
+            text = "".join(parts).strip()
+            with STAGE_SECONDS.time("chat_stream", "validate"):
+                reason = check_response(text)
+                assistant_text = validate_response(text)
+            record_response(fallback_reason=reason, rejected=[reason] if reason else [], candidates=1)
+            if reason is None and cache_key is not None:
+                RESPONSE_CACHE.set(cache_key, assistant_text)
+    except Exception as e:
+        reason = llm_failure_reason(e)
+        if reason == "llm_error":
+            print("LLM stream error:", e)
+        record_response(fallback_reason=reason)
+        assistant_text = get_fallback_response("llm_error")
+    finally:
+        # 클라이언트가 중간에 끊어도 대화 기록은 한 턴으로 맞춰 둔다
+        if assistant_text is None:
+            partial = "".join(parts).strip()
+            assistant_text = validate_response(partial) if partial else get_fallback_response("llm_error")
+        sess["messages"].append({"role": "assistant", "content": assistant_text})
+        if key is not None:
+            remember_reply(sess, key, assistant_text)
+        # 끊긴 스트림은 취소된 상태로 여기 오므로 저장은 취소에서 보호한다
+        with anyio.CancelScope(shield=True), STAGE_SECONDS.time("chat_stream", "store"):
+            await save_chat_fields(sid, sess)
+        schedule_summary_refresh(sid)
+        if fut is not None:
+            CHAT_INFLIGHT.end((sid, key), fut, result=assistant_text)
+
+    # 검증 과정에서 문장이 잘리거나 대체될 수 있으므로 최종본을 다시 보낸다
+    yield _sse("done", {"assistant": assistant_text})
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, "chat_stream")
+
+
+async def build_report(sid: str) -> Dict:
+    """요약·분석으로 리포트를 만들고 세션을 지운다 (리포트 작업 워커에서 실행)."""
+    t0 = time.perf_counter()
+
+    # 백그라운드에서 갱신해 둔 롤링 요약에 남은 델타만 반영
+    with STAGE_SECONDS.time("finalize", "summary"):
+        conversation_summary = await final_summary(sid)
+
+    # /chat 에서 턴마다 누적해 둔 사용자 발화 분석 결과를 읽기만 한다
+    with STAGE_SECONDS.time("finalize", "store"):
+        sess = await SESSIONS.aget(sid)
+    if sess is None:
+        raise KeyError(f"session {sid} expired before its report was built")
+    neg_ratio = None
+    if SENTIMENT is not None:
+        user_msgs = [m["content"] for m in sess["messages"] if m["role"] == "user"]
+        with STAGE_SECONDS.time("finalize", "sentiment"):
+            neg_ratio = await SENTIMENT.neg_ratio(user_msgs, timeout=SENTIMENT_TIMEOUT)
+    with STAGE_SECONDS.time("finalize", "analyze"):
+        analysis = analysis_result(sess["analysis"], neg_ratio)
+
+    t_report = time.perf_counter()
     report = {
         "summary": {
             "conversation_summary": conversation_summary,
@@ -390,12 +1192,65 @@ def finalize(req: FinalizeReq):
             if analysis["risk"]["need_immediate_help"] else ""
         ),
     }
+    STAGE_SECONDS.observe(time.perf_counter() - t_report, "finalize", "report")
 
-    # 리포트 반환
-    response = {"report": report}
+    # 세션 정리(원문 저장하지 않음). 리포트는 처음 조회할 때 지워진다
+    with STAGE_SECONDS.time("finalize", "store"):
+        await SESSIONS.adelete(sid)
 
-    # 세션 정리(원문 저장하지 않음)
-    if req.session_id in SESSIONS:
-        del SESSIONS[req.session_id]
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, "finalize_job")
+    return report
 
-    return response
+
+@app.post("/finalize", status_code=202)
+async def finalize(req: FinalizeReq, response: Response):
+    """
+    리포트 작업을 예약하고 job_id 를 바로 돌려준다. 결과는 GET /report/{job_id}.
+    REPORT_ASYNC=0 (서버리스 기본값)이면 리포트를 바로 만들어 200 {"status": "done", "report": ...} 로 돌려준다.
+    """
+    t0 = time.perf_counter()
+
+    if not REPORT_ASYNC:
+        await aget_session(req.session_id)
+        report = await build_report(req.session_id)
+        response.status_code = 200
+        REQUEST_SECONDS.observe(time.perf_counter() - t0, "finalize")
+        return {"status": REPORT_DONE, "report": report}
+
+    # 같은 세션의 재요청(프록시 타임아웃 후 재시도 등)에는 이미 예약한 작업을 돌려준다.
+    # 작업이 끝나면 세션이 지워지므로 세션보다 먼저 리포트 저장소의 연결을 본다
+    # (작업이 실패해 결과를 이미 읽어 간 경우에는 새로 예약한다)
+    # 동시에 온 두 요청이 둘 다 작업을 예약하지 않도록 확인과 예약은 submit_once 가 한 번에 한다
+    try:
+        job_id = await REPORT_JOBS.submit_once(
+            req.session_id,
+            lambda: build_report(req.session_id),
+            check=lambda: aget_session(req.session_id),
+        )
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry shortly.",
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+
+    REQUEST_SECONDS.observe(time.perf_counter() - t0, "finalize")
+    return {"job_id": job_id, "status": REPORT_PENDING}
+
+
+@app.get("/report/{job_id}")
+def get_report(job_id: str, response: Response):
+    """
+    작업 중이면 202 {"status": "pending"}, 끝났으면 200 {"status": "done", "report": ...}.
+    리포트는 한 번만 내주고 지운다 (다시 조회하면 404).
+    """
+    job = REPORT_JOBS.fetch(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report not found or already retrieved.")
+    if job["status"] == REPORT_PENDING:
+        response.status_code = 202
+        response.headers["Retry-After"] = "1"
+        return {"status": REPORT_PENDING}
+    if job["status"] == REPORT_ERROR:
+        raise HTTPException(status_code=500, detail="Report generation failed.")
+    return {"status": job["status"], "report": job["report"]}
@@ -0,0 +1,159 @@
+# backend/batch_score.py — 익명화된 대화 아카이브 오프라인 일괄 채점
+#
+#   python batch_score.py archive.jsonl -o scores.jsonl [--workers 8] [--chunk-size 256]
+#   python batch_score.py archive.jsonl -o scores.jsonl --start-offset 123456789 --append
+#   python batch_score.py archive.jsonl -o scores_v2.jsonl --weights weights_v2.json   # A/B 재채점
+#
+# 입력: 한 줄에 대화 하나
+#   {"id": "...", "messages": ["사용자 발화", ...]}
+#   {"id": "...", "messages": [{"role": "user"|"assistant", "content": "..."}, ...]}
+# 출력: 한 줄에 결과 하나 (입력 순서 유지)
+#   {"id": "...", "offset": <입력 바이트 오프셋>, "next_offset": <다음 줄 오프셋>, "analysis": {...},
+#    "scoring_version": <가중치 설정 버전>}
+#
+# 아카이브 전체를 메모리에 올리지 않도록 청크 단위로 읽고, 워커에 넘긴 청크 수도 제한한다.
+# 중단된 경우 출력 마지막 줄의 next_offset 을 --start-offset 으로 넘기면 이어서 처리한다.
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from backend.analyzer import SCORING, ScoringEngine, analyze_batch, load_scoring_engine
+    from backend.pii import pii_mask
+except ModuleNotFoundError:
+    from analyzer import SCORING, ScoringEngine, analyze_batch, load_scoring_engine
+    from pii import pii_mask
+
+# (입력 바이트 오프셋, 다음 줄 오프셋, 원본 줄)
+Line = Tuple[int, int, bytes]
+
+
+def iter_chunks(path: str, start_offset: int, chunk_size: int) -> Iterator[List[Line]]:
+    with open(path, "rb") as f:
+        f.seek(start_offset)
+        offset = start_offset
+        chunk: List[Line] = []
+        for raw in f:
+            next_offset = offset + len(raw)
+            if raw.strip():
+                chunk.append((offset, next_offset, raw))
+            offset = next_offset
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _user_messages(messages) -> List[str]:
+    out = []
+    for m in messages:
+        if isinstance(m, str):
+            out.append(m)
+        elif m.get("role") == "user":
+            out.append(m.get("content", ""))
+    return out
+
+
+_ENGINES: Dict[str, ScoringEngine] = {}
+
+
+def _engine(weights: Optional[str]) -> ScoringEngine:
+    # 워커 프로세스마다 설정 파일을 한 번만 읽는다
+    if not weights:
+        return SCORING
+    if weights not in _ENGINES:
+        _ENGINES[weights] = load_scoring_engine(weights)
+    return _ENGINES[weights]
+
+
+def score_chunk(chunk: List[Line], weights: Optional[str] = None) -> Tuple[List[str], int, int]:
+    """
+    워커 프로세스에서 실행: 마스킹 → 분석 → (결과 JSON 줄, 오류 수, 다음 오프셋)
+    점수는 청크의 대화를 모아 한 번의 행렬 연산으로 계산한다.
+    """
+    engine = _engine(weights)
+    recs = []
+    convs: List[List[str]] = []
+    for offset, next_offset, raw in chunk:
+        rec = {"offset": offset, "next_offset": next_offset}
+        try:
+            conv = json.loads(raw)
+            rec["id"] = conv.get("id")
+            convs.append([pii_mask(t) for t in _user_messages(conv.get("messages", []))])
+        except Exception as e:
+            rec["error"] = f"{type(e).__name__}: {e}"
+        recs.append(rec)
+
+    ok = [rec for rec in recs if "error" not in rec]
+    for rec, analysis in zip(ok, analyze_batch(convs, engine=engine)):
+        rec["analysis"] = analysis
+        rec["scoring_version"] = engine.version
+    return [json.dumps(rec, ensure_ascii=False) for rec in recs], len(recs) - len(ok), chunk[-1][1]
+
+
+def run(args) -> int:
+    max_pending = args.max_pending or args.workers * 2
+    mode = "a" if args.append else "w"
+    total = errors = 0
+    last_offset = args.start_offset
+    t0 = last_report = time.perf_counter()
+
+    sink = open(args.output, mode, encoding="utf-8") if args.output != "-" else nullcontext(sys.stdout)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool, sink as out:
+        pending = deque()
+
+        def drain_one():
+            nonlocal total, errors, last_offset, last_report
+            lines, n_errors, last_offset = pending.popleft().result()
+            out.write("".join(line + "\n" for line in lines))
+            out.flush()
+            total += len(lines)
+            errors += n_errors
+            now = time.perf_counter()
+            if now - last_report >= args.report_every:
+                last_report = now
+                print(f"[batch] {total} conversations, {total / (now - t0):.1f} conv/s, "
+                      f"next_offset={last_offset}", file=sys.stderr)
+
+        for chunk in iter_chunks(args.input, args.start_offset, args.chunk_size):
+            pending.append(pool.submit(score_chunk, chunk, args.weights))
+            if len(pending) >= max_pending:
+                drain_one()
+            if args.limit and total >= args.limit:
+                break
+        while pending:
+            drain_one()
+
+    elapsed = time.perf_counter() - t0
+    print(f"[batch] done: {total} conversations ({errors} errors) in {elapsed:.1f}s, "
+          f"{total / max(elapsed, 1e-9):.1f} conv/s, next_offset={last_offset}", file=sys.stderr)
+    return 1 if errors and args.strict else 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="대화 아카이브(JSONL)를 pii_mask + analyze_messages 로 일괄 채점")
+    ap.add_argument("input", help="입력 JSONL 경로")
+    ap.add_argument("-o", "--output", default="-", help="출력 JSONL 경로 (기본: stdout)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk-size", type=int, default=256, help="워커에 한 번에 넘기는 대화 수")
+    ap.add_argument("--max-pending", type=int, default=0, help="동시에 처리 중인 청크 상한 (기본: workers*2)")
+    ap.add_argument("--start-offset", type=int, default=0, help="이 바이트 오프셋부터 이어서 처리")
+    ap.add_argument("--append", action="store_true", help="출력 파일에 이어 쓰기 (재개 시)")
+    ap.add_argument("--limit", type=int, default=0, help="대략 이 개수만큼 처리 후 중단 (청크 단위)")
+    ap.add_argument("--report-every", type=float, default=5.0, help="진행 상황 출력 간격(초)")
+    ap.add_argument("--weights", help="점수 가중치 설정 JSON (기본: SCORING_WEIGHTS / scoring_weights.json, A/B 재채점용)")
+    ap.add_argument("--strict", action="store_true", help="파싱/분석 오류가 있으면 종료 코드 1")
+    return run(ap.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# backend/bench/bench_analyzer.py — analyze_messages 단일 패스 매처 마이크로벤치마크
+#
+#   python bench/bench_analyzer.py [--repeat 5]
+#
+# 규칙마다 단일 패스 매처와 re.search 의 매칭 여부가 같은지, 기존 구현(카테고리별 re.search 반복)과
+# 결과가 같은지 확인한 뒤, 대화 길이별 소요 시간을 비교한다.
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import (  # noqa: E402
+    ALL_PATTERNS, EMOTIONS, RISK_REGEX, THEMES, _build_matcher, _scan, analyze_messages,
+)
+
+# 합성 대화용 문장 조각 (키워드가 섞인 문장 + 평범한 문장)
+FRAGMENTS = [
+    "요즘 너무 우울해요", "밤마다 잠이 안 와서 괴로워요", "회사 야근 때문에 스트레스받아요",
+    "친구들과 만나는 게 부담스러워졌어요", "매일 불안해서 가슴이 두근거려요", "새벽에 깨요",
+    "월세랑 대출 때문에 돈 걱정이 많아요", "의욕이 없고 무기력해요", "가끔 화가 나고 짜증이 나요",
+    "조금은 나아질 수 있을 것 같아요", "가끔은 죽고 싶다는 생각도 들어요", "그냥 사라지고 싶어요", "오늘은 그냥 평범한 하루였어요", "점심은 김밥을 먹었어요",
+    "주말에는 집에서 쉬었어요", "날씨가 많이 추워졌네요", "버스를 타고 출근했어요",
+]
+
+
+def legacy_analyze(messages: List[str]) -> Dict[str, Any]:
+    """단일 패스 매처 도입 전 구현 (비교 기준)"""
+    def count(text, patterns):
+        return sum(1 for p in patterns if re.search(p, text))
+
+    texts = [t.lower() for t in messages]
+    risk_hits = [rx.pattern for line in texts for rx in RISK_REGEX if rx.search(line)]
+    theme_counts = {k: sum(count(line, pats) for line in texts) for k, pats in THEMES.items()}
+    emotion_counts = {k: sum(count(line, pats) for line in texts) for k, pats in EMOTIONS.items()}
+    highlights = []
+    for m in messages[-5:]:
+        if any(re.search(kw, m) for pats in EMOTIONS.values() for kw in pats):
+            highlights.append(m)
+        if len(highlights) >= 2:
+            break
+    return {"risk": sorted(set(risk_hits)), "themes": theme_counts,
+            "emotions": emotion_counts, "highlights": highlights}
+
+
+# 색인할 수 없는 모양의 규칙 (선택 글자로 시작, 최상위 분기, 문자 클래스, 이스케이프, 인라인 플래그)
+EXTRA_RULES = [r"울?적", r"초조|두근", r"[잠수]면", r"\.{3}", r"(?i)stress", r"(잠|수면)\s*부족"]
+EXTRA_FRAGMENTS = ["울적해요", "적적해요", "두근거려요", "잠이 부족해요", "수면 부족", "Stress 가 심해요", "그냥..."]
+
+
+def check_rules(messages: List[str]) -> None:
+    """규칙마다 매처의 매칭 여부가 re.search 와 같은지 확인 (실제 규칙 + 색인할 수 없는 모양의 규칙)"""
+    rules = ALL_PATTERNS + EXTRA_RULES
+    ids, by_first, unindexed, trigger = _build_matcher(rules)
+    for text in messages:
+        text = text.lower()
+        hits = _scan(text, by_first, unindexed, trigger)
+        for rule in rules:
+            assert (ids[rule] in hits) == bool(re.search(rule, text)), (rule, text)
+
+
+def make_transcript(n_messages: int, rng: random.Random) -> List[str]:
+    return [" ".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 4))) for _ in range(n_messages)]
+
+
+def bench(fn, messages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(messages)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    check_rules(FRAGMENTS + EXTRA_FRAGMENTS + make_transcript(2000, rng))
+    print(f"{len(ALL_PATTERNS) + len(EXTRA_RULES)} rules: single-pass matches identical to re.search")
+    print(f"{'messages':>9} {'legacy(ms)':>11} {'single-pass(ms)':>16} {'speedup':>8}")
+    for n in (10, 100, 1000, 5000):
+        msgs = make_transcript(n, rng)
+        new, old = analyze_messages(msgs), legacy_analyze(msgs)
+        assert old == {"risk": sorted(new["risk"]["hits"]), "themes": new["themes"],
+                       "emotions": new["emotions"], "highlights": new["highlights"]}, "결과 불일치"
+        t_old = bench(legacy_analyze, msgs, args.repeat)
+        t_new = bench(analyze_messages, msgs, args.repeat)
+        print(f"{n:>9} {t_old * 1e3:>11.2f} {t_new * 1e3:>16.2f} {t_old / t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
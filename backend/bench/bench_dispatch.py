@@ -0,0 +1,95 @@
+# backend/bench/bench_dispatch.py — 디스패처 유무에 따른 LLM 처리량 비교
+#
+#   python bench/bench_dispatch.py --base http://localhost:1234/v1 [--jobs 64] [--concurrency 32]
+#
+# /chat 턴(우선순위 높음)과 요약 작업이 섞인 부하를 같은 OpenAI 호환 서버(LM Studio 또는 로컬 스텁)에
+# 보내면서, 디스패처 없이 바로 보낼 때와 LLM_MAX_IN_FLIGHT 별 디스패처를 거칠 때의
+# 합산 생성 토큰/초와 /chat 지연(p50/p95)을 비교한다.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_client import LLMClient  # noqa: E402
+from llm_dispatch import PRIORITY_CHAT, PRIORITY_SUMMARY, LLMDispatcher  # noqa: E402
+
+CHAT = {"role": "user", "content": "요즘 너무 우울하고 잠이 안 와요. 어떻게 이야기를 시작하면 좋을까요?"}
+SUMMARY = {"role": "user", "content": "다음 대화를 2-3문장으로 요약해주세요.\n사용자: 잠이 안 와요\n챗봇: 언제부터 그러셨나요?"}
+
+
+def percentile(xs, q):
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+async def one(client, dispatcher, model, priority, max_tokens, out):
+    payload = {"model": model, "messages": [CHAT if priority == PRIORITY_CHAT else SUMMARY],
+               "max_tokens": max_tokens, "temperature": 0.3}
+    t0 = time.perf_counter()
+    if dispatcher is None:
+        data = await client.chat_completion(payload, timeout=300)
+    else:
+        async with dispatcher.slot(priority):
+            data = await client.chat_completion(payload, timeout=300)
+    usage = data.get("usage") or {}
+    tokens = usage.get("completion_tokens") or len(data["choices"][0]["message"]["content"]) // 2
+    out.append((priority, time.perf_counter() - t0, tokens))
+
+
+async def scenario(args, client, dispatcher):
+    rng = random.Random(args.seed)
+    sem = asyncio.Semaphore(args.concurrency)  # 동시 사용자 수
+    out = []
+
+    async def user(i):
+        async with sem:
+            prio = PRIORITY_SUMMARY if rng.random() < args.summary_ratio else PRIORITY_CHAT
+            await one(client, dispatcher, args.model, prio, args.max_tokens, out)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(args.jobs)))
+    elapsed = time.perf_counter() - t0
+    chat = [lat for p, lat, _ in out if p == PRIORITY_CHAT]
+    return sum(t for _, _, t in out) / elapsed, percentile(chat, 0.5), percentile(chat, 0.95), elapsed
+
+
+async def run(args):
+    client = LLMClient(args.base, api_key=os.getenv("OPENAI_API_KEY"), max_connections=args.concurrency * 2)
+    client.start()
+    try:
+        rows = [("direct", None)] + [
+            (f"dispatch x{n}", LLMDispatcher(max_in_flight=n, batch_window=args.batch_window_ms / 1000))
+            for n in args.max_in_flight
+        ]
+        print(f"{'mode':>14} {'tok/s':>9} {'chat p50(ms)':>13} {'chat p95(ms)':>13} {'wall(s)':>8}")
+        for name, dispatcher in rows:
+            tps, p50, p95, wall = await scenario(args, client, dispatcher)
+            print(f"{name:>14} {tps:>9.1f} {p50 * 1e3:>13.1f} {p95 * 1e3:>13.1f} {wall:>8.2f}")
+            if dispatcher is not None:
+                await dispatcher.close()
+    finally:
+        await client.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default=os.getenv("OPENAI_BASE", "http://localhost:1234/v1").split(",")[0])
+    ap.add_argument("--model", default=os.getenv("OPENAI_MODEL", "Qwen2.5-7B-Instruct"))
+    ap.add_argument("--jobs", type=int, default=64)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--summary-ratio", type=float, default=0.2)
+    ap.add_argument("--max-tokens", type=int, default=150)
+    ap.add_argument("--max-in-flight", type=int, nargs="+", default=[4, 8])
+    ap.add_argument("--batch-window-ms", type=float, default=5)
+    ap.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# backend/bench/bench_micro.py — 요청 경로의 CPU 함수 마이크로벤치마크
+#
+#   python bench/bench_micro.py [--repeat 5] [--sizes 10 100 1000 5000]
+#
+# 합성 한국어 대화 길이를 늘려 가며 analyze_messages / pii_mask / validate_response 의 소요 시간을 잰다.
+#   analyze_messages  : 메시지 n 개 대화 전체 분석
+#   pii_mask          : 메시지 n 개를 하나씩 마스킹 (일부 메시지에 전화번호·이메일·이름 포함)
+#   validate_response : 문장 n 개짜리 응답 검증 (문장 수 제한으로 잘리는 경로 포함)
+# 각 값은 repeat 번 중 최솟값이며, 메시지(문장)당 마이크로초도 함께 출력한다.
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import analyze_messages  # noqa: E402
+from app import validate_response  # noqa: E402
+from bench_analyzer import make_transcript  # noqa: E402
+from pii import pii_mask  # noqa: E402
+
+PII_SNIPPETS = [
+    "제 번호는 010-1234-5678 이에요", "메일은 someone.kim@example.com 으로 주세요",
+    "저는 김민수 입니다", "내 이름은 박지현", "연락처 02-345-6789",
+]
+RESPONSE_SENTENCES = [
+    "마음이 많이 힘드셨겠어요.", "그런 상황이라면 누구라도 지칠 수 있어요.", "요즘 가장 신경 쓰이는 일은 어떤 건가요?",
+    "말씀해 주셔서 고마워요.", "잠을 못 자면 하루가 더 버겁게 느껴지죠.", "언제부터 그런 느낌이 드셨나요?",
+]
+
+
+def with_pii(messages, rng: random.Random, ratio: float = 0.2):
+    return [m + " " + rng.choice(PII_SNIPPETS) if rng.random() < ratio else m for m in messages]
+
+
+def make_response(n_sentences: int, rng: random.Random) -> str:
+    return " ".join(rng.choice(RESPONSE_SENTENCES) for _ in range(n_sentences))
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'function':>18} {'n':>6} {'total(ms)':>10} {'per item(us)':>13}")
+    for n in args.sizes:
+        msgs = with_pii(make_transcript(n, rng), rng)
+        response = make_response(n, rng)
+        rows = [
+            ("analyze_messages", best_of(lambda: analyze_messages(msgs), args.repeat)),
+            ("pii_mask", best_of(lambda: [pii_mask(m) for m in msgs], args.repeat)),
+            ("validate_response", best_of(lambda: validate_response(response), args.repeat)),
+        ]
+        for name, t in rows:
+            print(f"{name:>18} {n:>6} {t * 1e3:>10.3f} {t / n * 1e6:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# backend/bench/bench_pii.py — 단일 패스 PII 스캐너 마이크로벤치마크
+#
+#   python bench/bench_pii.py [--repeat 5]
+#
+# 기존 구현(re.sub 세 번)과 결과가 같은지(경계 사례 + 합성 입력) 확인한 뒤, 입력 길이별 소요 시간을 비교한다.
+#   short   : /chat 한 턴 길이 메시지 1000개 (PII 없는 메시지가 대부분)
+#   paste   : 일기·대화 로그를 붙여 넣은 긴 입력 (구간 단위 스캔 경로)
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pii import EMAIL_RE, NAME_RE, PHONE_RE, pii_mask, pii_scan  # noqa: E402
+
+PLAIN = [
+    "요즘 너무 우울해요", "밤마다 잠이 안 와서 괴로워요", "회사 야근 때문에 스트레스받아요",
+    "친구들과 만나는 게 부담스러워졌어요", "오늘은 그냥 평범한 하루였어요", "점심은 김밥을 먹었어요",
+]
+WITH_PII = [
+    "제 번호는 010-1234-5678 이에요", "메일은 someone.kim@example.com 으로 주세요",
+    "어제 김민수님 만났어요", "박지현씨 는 잘 지내요", "사무실 02-345-6789 로 전화 주세요",
+]
+
+
+def legacy_mask(text: str) -> str:
+    """단일 패스 스캐너 도입 전 구현 (비교 기준)"""
+    masked = PHONE_RE.sub("<PHONE>", text)
+    masked = EMAIL_RE.sub("<EMAIL>", masked)
+    masked = NAME_RE.sub("<NAME>", masked)
+    return masked
+
+
+# 호칭·경계·패턴이 맞닿는 경우 (구간 크기를 바꿔 가며 확인한다)
+EDGE_CASES = [
+    "김민수님", "김민수님 ", "김님 ", "가나다라님 ", "가나다라마님 ", "아김민수님 ", "x김민수님 ", "김민수님이 ",
+    "김씨님 ", "씨 님 ", "김민수씨\n박지현님\t", "남궁민수님", "민님", "a@b.co김민수님 ", "010-1234-5678김민수님 ",
+    "김민수님 010-1234-5678 kim@example.com 박지현씨", "메일 kim@example.com님 ", "이름 010-1234-5678님 ",
+]
+
+
+def check_edge_cases() -> None:
+    for text in EDGE_CASES:
+        for chunk in (0, 1, 3, 8, 8192):
+            assert pii_scan(text, chunk_chars=chunk).text == legacy_mask(text), (text, chunk)
+
+
+def make_text(n_sentences: int, rng: random.Random, pii_ratio: float) -> str:
+    return " ".join(rng.choice(WITH_PII if rng.random() < pii_ratio else PLAIN) for _ in range(n_sentences))
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    check_edge_cases()
+    print(f"{len(EDGE_CASES)} edge cases: identical to the sequential re.sub chain")
+
+    rng = random.Random(args.seed)
+    cases = [("short x1000", [make_text(1, rng, 0.1) for _ in range(1000)])]
+    for n in (100, 1000, 10000, 50000):
+        cases.append((f"paste {n} sent.", [make_text(n, rng, 0.1)]))
+
+    print(f"{'case':>18} {'chars':>9} {'legacy(ms)':>11} {'scan(ms)':>9} {'speedup':>8} {'spans':>7}")
+    for name, texts in cases:
+        for t in texts:
+            assert pii_mask(t) == legacy_mask(t), "결과 불일치"
+        t_old = best_of(lambda: [legacy_mask(t) for t in texts], args.repeat)
+        t_new = best_of(lambda: [pii_mask(t) for t in texts], args.repeat)
+        spans = sum(len(pii_scan(t).spans) for t in texts)
+        chars = sum(len(t) for t in texts)
+        print(f"{name:>18} {chars:>9} {t_old * 1e3:>11.3f} {t_new * 1e3:>9.3f} {t_old / t_new:>7.2f}x {spans:>7}")
+
+
+if __name__ == "__main__":
+    main()
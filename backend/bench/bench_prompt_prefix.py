@@ -0,0 +1,111 @@
+# backend/bench/bench_prompt_prefix.py — 시스템 프롬프트 접두 공유에 따른 prefill 시간 비교
+#
+#   python bench/bench_prompt_prefix.py --base http://localhost:1234/v1 [--profiles 8] [--rounds 3]
+#
+#   # LM Studio 없이: 접두 캐시를 흉내 내는 스텁으로 (--prefix-cache 없이 띄운 스텁은 두 배치의 TTFT 가 같다)
+#   python bench/stub_llm.py --port 1235 --prefix-cache 4 --prefill-us-per-char 200 &
+#   python bench/bench_prompt_prefix.py --base http://127.0.0.1:1235/v1
+#
+# LM Studio(또는 --prefix-cache 를 켠 스텁)에 스트리밍 요청을 보내 첫 토큰까지 걸린 시간(TTFT)을 잰다.
+#   shared-prefix : build_system_prompt() 배치 — 정적 지침이 앞, 프로필이 뒤 (세션 간 접두 공유)
+#   profile-first : 프로필 블록을 정적 지침 앞에 두는 배치 — 사용자마다 접두가 달라져 캐시를 못 씀
+# 두 배치의 TTFT 차이가 접두 캐시로 아낀 prefill 시간이다. 빌더 자체의 메모이제이션 효과도 함께 출력한다.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import OPENAI_MODEL, SYSTEM_PROMPT, build_system_prompt  # noqa: E402
+
+GENDERS = ["남성", "여성", ""]
+AGES = ["10대", "20대", "30대", "40대", "50대 이상"]
+JOBS = ["학생", "직장인", "프리랜서", "자영업", "주부", "구직 중"]
+USER_TURN = {"role": "user", "content": "요즘 너무 우울하고 잠이 안 와요"}
+
+
+def profiles(n):
+    return [(GENDERS[i % len(GENDERS)], AGES[i % len(AGES)], JOBS[i % len(JOBS)]) for i in range(n)]
+
+
+def profile_first(gender, age, job):
+    # 비교용: 같은 내용이지만 프로필이 앞에 오는 배치
+    tail = build_system_prompt(gender, age, job)[len(SYSTEM_PROMPT):]
+    return tail.lstrip("\n") + "\n\n" + SYSTEM_PROMPT
+
+
+async def ttft(client, base, system_prompt) -> float:
+    payload = {
+        "model": OPENAI_MODEL,
+        "messages": [{"role": "system", "content": system_prompt}, USER_TURN],
+        "max_tokens": 1,
+        "temperature": 0,
+        "stream": True,
+    }
+    t0 = time.perf_counter()
+    async with client.stream("POST", f"{base}/chat/completions", json=payload) as r:
+        r.raise_for_status()
+        async for line in r.aiter_lines():
+            if line.startswith("data:") and line.strip() != "data: [DONE]":
+                return time.perf_counter() - t0
+    return time.perf_counter() - t0
+
+
+async def run(args):
+    api_key = os.getenv("OPENAI_API_KEY")
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    async with httpx.AsyncClient(timeout=120, headers=headers) as client:
+        # 서버 쪽 정적 접두를 한 번 데워 둔다
+        await ttft(client, args.base, build_system_prompt())
+
+        results = {}
+        for name, layout in (("shared-prefix", lambda p: build_system_prompt(*p)), ("profile-first", lambda p: profile_first(*p))):
+            samples = []
+            for _ in range(args.rounds):
+                for p in profiles(args.profiles):
+                    samples.append(await ttft(client, args.base, layout(p)))
+            results[name] = samples
+            print(f"{name:>14}: TTFT p50 {statistics.median(samples) * 1e3:8.1f} ms   "
+                  f"mean {statistics.fmean(samples) * 1e3:8.1f} ms   (n={len(samples)})")
+
+        saved = statistics.median(results["profile-first"]) - statistics.median(results["shared-prefix"])
+        print(f"{'saved':>14}: {saved * 1e3:8.1f} ms prefill per request (p50)")
+
+
+def bench_builder(n=100000):
+    ps = profiles(30)
+    build_system_prompt.cache_clear()
+    t0 = time.perf_counter()
+    for i in range(n):
+        build_system_prompt(*ps[i % len(ps)])
+    memo = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i in range(n):
+        build_system_prompt.__wrapped__(*ps[i % len(ps)])
+    raw = time.perf_counter() - t0
+    print(f"{'builder':>14}: memoized {memo / n * 1e6:.2f} us/call vs rebuild {raw / n * 1e6:.2f} us/call "
+          f"({build_system_prompt.cache_info()})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--base", default=os.getenv("OPENAI_BASE", "http://localhost:1234/v1").split(",")[0])
+    ap.add_argument("--profiles", type=int, default=8, help="서로 다른 사용자 프로필 수")
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--builder-only", action="store_true", help="LLM 서버 없이 빌더 비용만 측정")
+    args = ap.parse_args()
+
+    bench_builder()
+    if not args.builder_only:
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# backend/bench/bench_scoring.py — 가중치 행렬 채점 엔진 검증 + 일괄 채점 벤치마크
+#
+#   python bench/bench_scoring.py [--n 100000] [--repeat 3] [--weights path.json]
+#
+# 무작위 누적 상태(주제·감정 카운트, 위험 신호, neg_ratio)로
+#   1) 기본 가중치의 ScoringEngine 결과(한 줄씩 / 행렬)가 예전 if 문 규칙과 비트 단위로 같은지 확인하고
+#   2) 같은 조건끼리 시간을 비교한다.
+#      scores : 점수만 계산 (예전 if 문 / 대화마다 score / 카운트 행렬 + score)
+#      result : analysis_result 가 돌려주는 결과 dict 전체 (예전 구현 = if 문 점수 + 같은 dict 조립)
+#      "matrix only" 는 카운트 행렬을 한 번 만들어 둔 뒤 가중치만 바꿔 다시 채점할 때의 비용이다.
+# --weights 를 주면 그 설정으로 다시 채점해 기본 설정과 점수가 달라진 대화 비율을 출력한다 (A/B 재채점).
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analyzer import (  # noqa: E402
+    EMOTIONS, RISK_PATTERNS, SCORING, THEMES, _result, analysis_result, analysis_result_batch, count_matrix,
+    load_scoring_engine, new_analysis_state,
+)
+
+
+def legacy_scores(state: Dict[str, Any], neg_ratio: Optional[float] = None) -> Dict[str, int]:
+    """가중치 행렬 도입 전 구현 (비교 기준)"""
+    theme_counts = state["theme_counts"]
+    emotion_counts = state["emotion_counts"]
+    risk_hits = state["risk_hits"]
+    risk_level = 80 if any(("죽고" in h) or ("자해" in h) for h in risk_hits) else (60 if risk_hits else 0)
+
+    def clamp(x): return max(0, min(100, int(x)))
+
+    dep = 0
+    dep += 20 * bool(emotion_counts["슬픔"])
+    dep += 20 * bool(emotion_counts["무기력"])
+    dep += 10 * min(theme_counts["수면"], 2)
+    dep += 10 * (theme_counts["대인/가족"] > 1)
+    dep += 30 if risk_level >= 60 else 0
+    if neg_ratio is not None:
+        dep += 20 * neg_ratio
+
+    anx = 0
+    anx += 25 * bool(emotion_counts["불안"])
+    anx += 10 * min(theme_counts["건강/신체"], 2)
+    anx += 10 * min(theme_counts["업무/학업"], 2)
+    anx += 20 * bool(emotion_counts["무기력"])
+    anx += 20 if risk_level >= 60 else 0
+    if neg_ratio is not None:
+        anx += 10 * neg_ratio
+
+    stress = 0
+    stress += 15 * min(theme_counts["업무/학업"], 2)
+    stress += 15 * min(theme_counts["대인/가족"], 2)
+    stress += 15 * min(theme_counts["금전/생활"], 2)
+    stress += 15 * bool(emotion_counts["분노"])
+    stress += 10 * min(theme_counts["수면"], 2)
+    return {"depression": clamp(dep), "anxiety": clamp(anx), "stress": clamp(stress)}
+
+
+def random_state(rng: random.Random) -> Dict[str, Any]:
+    state = new_analysis_state()
+    for k in THEMES:
+        state["theme_counts"][k] = rng.choice((0, 0, 0, 1, 1, 2, 3, 7))
+    for k in EMOTIONS:
+        state["emotion_counts"][k] = rng.choice((0, 0, 1, 2, 5))
+    state["risk_hits"] = rng.sample(RISK_PATTERNS, rng.choice((0, 0, 0, 1, 2)))
+    return state
+
+
+def random_neg_ratio(rng: random.Random) -> Optional[float]:
+    # 실제 값처럼 (부정 메시지 수 / 표본 수 ≤ 5) 비율을 주로 쓰고, 임의 실수도 섞는다
+    r = rng.random()
+    if r < 0.3:
+        return None
+    if r < 0.8:
+        total = rng.randint(1, 5)
+        return rng.randint(0, total) / total
+    return rng.random()
+
+
+def best_of(fn, repeat: int) -> float:
+    # timeit 처럼 GC 를 끄고 잰다 (결과 dict 수만 개가 쌓이며 도는 GC 가 행마다 다르게 끼어들지 않도록)
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        finally:
+            gc.enable()
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=100000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--weights", help="A/B 비교할 가중치 설정 JSON")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    states = [random_state(rng) for _ in range(args.n)]
+    negs = [random_neg_ratio(rng) for _ in range(args.n)]
+
+    batch = analysis_result_batch(states, negs)
+    for state, neg, res in zip(states, negs, batch):
+        expected = legacy_scores(state, neg)
+        assert res["scores"] == expected, (state, neg, res["scores"])
+        assert analysis_result(state, neg)["scores"] == expected, (state, neg)
+    print(f"{args.n} states: scores identical to the legacy rules (per conv and batch)")
+
+    pairs = list(zip(states, negs))
+    names = SCORING.score_names
+    counts = count_matrix(states)
+    rows = (
+        ("scores", "legacy if-chain", lambda: [legacy_scores(s, r) for s, r in pairs]),
+        ("scores", "engine per conv", lambda: [dict(zip(names, SCORING.score(count_matrix([s]), [r])[0])) for s, r in pairs]),
+        ("scores", "engine batch", lambda: SCORING.score(count_matrix(states), negs)),
+        ("scores", "matrix only", lambda: SCORING.score(counts, negs)),
+        ("result", "legacy if-chain", lambda: [_result(s, legacy_scores(s, r)) for s, r in pairs]),
+        ("result", "engine per conv", lambda: [analysis_result(s, r) for s, r in pairs]),
+        ("result", "engine batch", lambda: analysis_result_batch(states, negs)),
+    )
+    print(f"{'what':>6} {'mode':>16} {'total(ms)':>10} {'us/conv':>8}")
+    for what, name, fn in rows:
+        t = best_of(fn, args.repeat)
+        print(f"{what:>6} {name:>16} {t * 1e3:>10.1f} {t / args.n * 1e6:>8.2f}")
+
+    if args.weights:
+        other = analysis_result_batch(states, negs, load_scoring_engine(args.weights))
+        changed = sum(a["scores"] != b["scores"] for a, b in zip(batch, other))
+        print(f"A/B: {changed}/{args.n} conversations ({changed / args.n:.1%}) scored differently")
+
+
+if __name__ == "__main__":
+    main()
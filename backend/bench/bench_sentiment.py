@@ -0,0 +1,70 @@
+# backend/bench/bench_sentiment.py — 감성 분류 엔진 기동 시간 / 마이크로배치 처리량
+#
+#   SENTIMENT_BACKEND=auto python bench/bench_sentiment.py [--concurrency 32] [--rounds 5]
+#
+# transformers(+ optimum[onnxruntime] 또는 torch) 가 설치되어 있어야 한다.
+# 동시 /finalize 요청 C 개가 각각 최근 5개 메시지를 분류한다고 가정하고,
+# 요청별 단건 호출(model_scores)과 엔진의 마이크로배치(neg_ratio)를 비교한다.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_wrap import SentimentEngine, model_scores  # noqa: E402
+
+SAMPLE = [
+    "요즘 너무 우울해요", "밤마다 잠이 안 와서 괴로워요", "회사 일 때문에 스트레스가 심해요",
+    "그래도 조금은 나아질 것 같아요", "친구들과 만나는 게 부담스러워요",
+]
+
+
+async def run(args):
+    engine = SentimentEngine(backend=args.backend, max_batch=args.max_batch,
+                             batch_window=args.batch_window_ms / 1000)
+    t0 = time.perf_counter()
+    engine.start()
+    print(f"start() returned in {(time.perf_counter() - t0) * 1e3:.1f} ms (model loads in background)")
+    await asyncio.get_running_loop().run_in_executor(None, engine._ready.wait)
+    if not engine.ready:
+        print(f"model unavailable: {engine.error}")
+        return
+    print(f"model ready in {engine.load_seconds:.2f}s (backend={args.backend})")
+
+    # 기준: 요청마다 단건 호출
+    t0 = time.perf_counter()
+    for _ in range(args.rounds * args.concurrency):
+        model_scores(engine._clf, SAMPLE)
+    single = time.perf_counter() - t0
+
+    # 엔진: 동시 요청을 마이크로배치
+    t0 = time.perf_counter()
+    for _ in range(args.rounds):
+        await asyncio.gather(*(engine.neg_ratio(SAMPLE, timeout=60) for _ in range(args.concurrency)))
+    batched = time.perf_counter() - t0
+
+    n = args.rounds * args.concurrency
+    s = engine.stats()
+    print(f"per-request calls : {n / single:8.1f} req/s ({n * len(SAMPLE) / single:8.1f} msg/s)")
+    print(f"micro-batched     : {n / batched:8.1f} req/s ({n * len(SAMPLE) / batched:8.1f} msg/s), "
+          f"{s['batches']} batches, avg batch {s['avg_batch_size']:.1f} msgs, "
+          f"{s['items_per_sec']:.1f} msg/s inside batches")
+    engine.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=os.getenv("SENTIMENT_BACKEND", "auto"))
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--max-batch", type=int, default=64)
+    ap.add_argument("--batch-window-ms", type=float, default=10)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# backend/bench/load_test.py — /session → N×/chat → /finalize → /report 부하 테스트
+#
+#   python bench/load_test.py --spawn [--sessions 100] [--concurrency 20] [--turns 4] [--stream]
+#   python bench/load_test.py --target http://127.0.0.1:8000      # 이미 떠 있는 백엔드에 보낼 때
+#
+# 가상 사용자 concurrency 명이 세션을 하나씩 맡아 대화 한 번(세션 생성 → turns 번 채팅 → 종료)을 끝까지 진행한다.
+# 엔드포인트별 요청 수·오류 수·p50/p95/p99 지연·초당 처리량을 출력한다 (--stream 이면 첫 토큰 지연도).
+# --spawn 이면 stub_llm.py 와 uvicorn app:app 을 직접 띄우고, 끝나면 내린다 (스텁 옵션은 --stub-* 로 전달).
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+UTTERANCES = [
+    "요즘 너무 우울해요", "밤마다 잠이 안 와서 괴로워요", "회사 야근 때문에 스트레스받아요",
+    "친구들과 만나는 게 부담스러워졌어요", "매일 불안해서 가슴이 두근거려요",
+    "월세랑 대출 때문에 돈 걱정이 많아요", "의욕이 없고 무기력해요", "가끔 화가 나고 짜증이 나요",
+    "오늘은 그냥 평범한 하루였어요", "주말에는 집에서 쉬었어요", "부모님이랑 자주 다퉈요",
+    "시험 준비 때문에 숨이 막혀요", "연락은 010-1234-5678 로 주세요",
+]
+PROFILES = [
+    {"gender": "여성", "ageGroup": "20대", "occupation": "학생"},
+    {"gender": "남성", "ageGroup": "30대", "occupation": "직장인"},
+    {"gender": "", "ageGroup": "40대", "occupation": "자영업"},
+    {},
+]
+
+
+def percentile(xs: List[float], q: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else 0.0
+
+
+class Recorder:
+    def __init__(self):
+        self.latency: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, name: str, coro):
+        t0 = time.perf_counter()
+        try:
+            r = await coro
+            r.raise_for_status()
+        except Exception:
+            self.errors[name] += 1
+            return None
+        self.latency[name].append(time.perf_counter() - t0)
+        return r
+
+    def report(self, wall: float) -> None:
+        names = sorted(set(self.latency) | set(self.errors))
+        print(f"{'endpoint':>16} {'n':>6} {'err':>5} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'mean(ms)':>9} {'req/s':>8}")
+        for name in names:
+            xs = self.latency[name]
+            mean = sum(xs) / len(xs) if xs else 0.0
+            print(f"{name:>16} {len(xs):>6} {self.errors[name]:>5} {percentile(xs, 0.5) * 1e3:>9.1f} "
+                  f"{percentile(xs, 0.95) * 1e3:>9.1f} {percentile(xs, 0.99) * 1e3:>9.1f} {mean * 1e3:>9.1f} "
+                  f"{len(xs) / wall:>8.1f}")
+        print(f"wall {wall:.2f}s")
+
+
+async def stream_chat(client: httpx.AsyncClient, rec: Recorder, sid: str, text: str) -> None:
+    t0 = time.perf_counter()
+    first: Optional[float] = None
+    try:
+        async with client.stream("POST", "/chat/stream", json={"session_id": sid, "text": text}) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if first is None and line.startswith("data:"):
+                    first = time.perf_counter() - t0
+    except Exception:
+        rec.errors["/chat/stream"] += 1
+        return
+    rec.latency["/chat/stream"].append(time.perf_counter() - t0)
+    if first is not None:
+        rec.latency["/chat/stream ttft"].append(first)
+
+
+async def conversation(client: httpx.AsyncClient, rec: Recorder, rng: random.Random, args) -> None:
+    body = {"consent": True, "region": "서울", **rng.choice(PROFILES)}
+    r = await rec.call("/session", client.post("/session", json=body))
+    if r is None:
+        return
+    sid = r.json()["session_id"]
+    for _ in range(args.turns):
+        text = rng.choice(UTTERANCES)
+        if args.stream:
+            await stream_chat(client, rec, sid, text)
+        else:
+            await rec.call("/chat", client.post("/chat", json={"session_id": sid, "text": text}))
+        if args.think_ms:
+            await asyncio.sleep(rng.uniform(0, args.think_ms) / 1000)
+    t0 = time.perf_counter()
+    r = await rec.call("/finalize", client.post("/finalize", json={"session_id": sid}))
+    if r is None:
+        return
+    await poll_report(client, rec, r.json()["job_id"], t0)
+
+
+async def poll_report(client: httpx.AsyncClient, rec: Recorder, job_id: str, t0: float) -> None:
+    """/finalize 부터 리포트를 받을 때까지 (프론트엔드처럼 조회를 반복)"""
+    while True:
+        try:
+            r = await client.get(f"/report/{job_id}")
+            r.raise_for_status()
+        except Exception:
+            rec.errors["/report ready"] += 1
+            return
+        if r.status_code == 200:
+            rec.latency["/report ready"].append(time.perf_counter() - t0)
+            return
+        await asyncio.sleep(0.2)
+
+
+async def run(args) -> None:
+    rng = random.Random(args.seed)
+    rec = Recorder()
+    sem = asyncio.Semaphore(args.concurrency)
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        async def user():
+            async with sem:
+                await conversation(client, rec, rng, args)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(args.sessions)))
+        wall = time.perf_counter() - t0
+
+        rec.report(wall)
+        try:
+            stats = (await client.get("/stats")).json()
+            print(json.dumps({k: stats[k] for k in ("responses", "llm_dispatch") if k in stats}, ensure_ascii=False))
+        except Exception:
+            pass
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def spawn(args) -> List[subprocess.Popen]:
+    """스텁 LLM 과 백엔드를 하위 프로세스로 띄운다."""
+    stub_cmd = [sys.executable, os.path.join(BACKEND_DIR, "bench", "stub_llm.py"), "--port", str(args.stub_port),
+                "--ttft-ms", str(args.stub_ttft_ms), "--tokens-per-sec", str(args.stub_tokens_per_sec),
+                "--error-rate", str(args.stub_error_rate)]
+    env = {**os.environ, "OPENAI_BASE": f"http://127.0.0.1:{args.stub_port}/v1"}
+    app_cmd = [sys.executable, "-m", "uvicorn", "app:app", "--port", str(args.app_port),
+               "--log-level", "warning", "--workers", str(args.workers)]
+    procs = [subprocess.Popen(stub_cmd, cwd=BACKEND_DIR)]
+    _wait_ready(f"http://127.0.0.1:{args.stub_port}/stats")
+    procs.append(subprocess.Popen(app_cmd, cwd=BACKEND_DIR, env=env))
+    _wait_ready(f"http://127.0.0.1:{args.app_port}/stats")
+    args.target = f"http://127.0.0.1:{args.app_port}"
+    return procs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--target", default="http://127.0.0.1:8000")
+    ap.add_argument("--sessions", type=int, default=100, help="진행할 대화(세션) 수")
+    ap.add_argument("--concurrency", type=int, default=20, help="동시 가상 사용자 수")
+    ap.add_argument("--turns", type=int, default=4, help="세션당 /chat 횟수")
+    ap.add_argument("--stream", action="store_true", help="/chat 대신 /chat/stream 사용")
+    ap.add_argument("--think-ms", type=float, default=0, help="턴 사이 사용자 대기 시간 상한")
+    ap.add_argument("--timeout", type=float, default=120)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--spawn", action="store_true", help="스텁 LLM 과 백엔드를 직접 띄운다")
+    ap.add_argument("--app-port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--stub-port", type=int, default=1235)
+    ap.add_argument("--stub-ttft-ms", type=float, default=150)
+    ap.add_argument("--stub-tokens-per-sec", type=float, default=40)
+    ap.add_argument("--stub-error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    procs = spawn(args) if args.spawn else []
+    try:
+        asyncio.run(run(args))
+    finally:
+        for p in reversed(procs):
+            p.terminate()
+            p.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
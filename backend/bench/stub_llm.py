@@ -0,0 +1,167 @@
+# backend/bench/stub_llm.py — LM Studio 없이 벤치마크하기 위한 OpenAI 호환 스텁 서버
+#
+#   python bench/stub_llm.py [--port 1235] [--ttft-ms 150] [--tokens-per-sec 40] [--reply-tokens 40]
+#   OPENAI_BASE=http://127.0.0.1:1235/v1 uvicorn app:app --port 8000
+#
+# POST /v1/chat/completions 만 흉내 낸다.
+#   - 첫 토큰까지 ttft-ms(+ 프롬프트 길이 비례 prefill) 만큼 기다린 뒤 tokens-per-sec 속도로 토큰을 낸다
+#   - stream=true 면 SSE(data: {...} / data: [DONE]), 아니면 다 만든 뒤 한 번에 JSON
+#   - n 파라미터, usage(prompt/completion 토큰 수) 지원
+#   - --error-rate 로 일정 비율 500 응답을 섞어 대체 응답 경로도 잴 수 있다
+#   - --prefix-cache N 이면 최근 N 개 프롬프트를 기억하고, 그중 가장 길게 겹치는 접두만큼은 prefill 지연을 빼 준다
+#     (LM Studio / llama.cpp 의 KV 캐시 접두 재사용 흉내. 0 이면 끔 → 프롬프트 배치를 바꿔도 TTFT 가 같다)
+# 토큰은 한국어 어절 하나로 친다. 응답은 validate_response 를 통과하는 상담 문장으로 만든다.
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLIES = [
+    "마음이 많이 힘드셨겠어요. 그런 상황이라면 누구라도 지칠 수 있어요. 요즘 가장 신경 쓰이는 일은 어떤 건가요?",
+    "말씀해 주셔서 고마워요. 잠을 제대로 못 자면 하루가 더 버겁게 느껴지죠. 언제부터 그런 느낌이 드셨나요?",
+    "혼자서 많이 버티셨던 것 같아요. 지금 이야기하면서 어떤 마음이 드시는지 조금 더 들려주실 수 있을까요?",
+    "그 일이 계속 마음에 남아 있으셨군요. 그때 가장 크게 느껴졌던 감정은 무엇이었나요?",
+]
+SUMMARY = "사용자는 최근 수면 문제와 업무 스트레스로 우울감과 불안을 느끼고 있다고 이야기했다. 챗봇은 공감하며 증상이 시작된 시점과 주요 스트레스 요인을 물었다."
+
+
+def build_app(args) -> FastAPI:
+    app = FastAPI(title="stub-llm")
+    rng = random.Random(args.seed)
+    stats: Dict[str, int] = {"requests": 0, "streams": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0,
+                             "prompt_chars": 0, "cached_prompt_chars": 0}
+    recent_prompts: Deque[str] = deque(maxlen=args.prefix_cache or None)
+
+    def reply_tokens(messages: List[Dict]) -> List[str]:
+        last = messages[-1]["content"] if messages else ""
+        text = SUMMARY if "요약" in last else rng.choice(REPLIES)
+        words = text.split(" ")
+        n = max(1, min(args.reply_tokens, len(words))) if args.reply_tokens else len(words)
+        return [w if i == 0 else " " + w for i, w in enumerate(words[:n])]
+
+    def cached_prefix(prompt: str) -> int:
+        """recent_prompts 중 prompt 와 가장 길게 겹치는 접두 글자 수. 이번 프롬프트를 기억해 둔다."""
+        if not args.prefix_cache:
+            return 0
+        hit = max((len(os.path.commonprefix([prompt, p])) for p in recent_prompts), default=0)
+        if prompt in recent_prompts:
+            recent_prompts.remove(prompt)
+        recent_prompts.append(prompt)
+        return hit
+
+    def prefill_delay(messages: List[Dict]) -> float:
+        # 채팅 템플릿처럼 역할과 내용을 이어 붙인 문자열을 프롬프트로 본다
+        prompt = "".join(f"<|{m.get('role', '')}|>\n{m.get('content', '')}\n" for m in messages)
+        new_chars = len(prompt) - cached_prefix(prompt)
+        stats["prompt_chars"] += len(prompt)
+        stats["cached_prompt_chars"] += len(prompt) - new_chars
+        jitter = rng.uniform(-args.jitter, args.jitter) if args.jitter else 0.0
+        return max(0.0, args.ttft_ms / 1000 * (1 + jitter) + new_chars * args.prefill_us_per_char / 1e6)
+
+    def usage(messages: List[Dict], completion: int) -> Dict[str, int]:
+        prompt = sum(len(m.get("content", "").split()) for m in messages)
+        return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+    @app.middleware("http")
+    async def track(request: Request, call_next):
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            return await call_next(request)
+        finally:
+            stats["in_flight"] -= 1
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        model = body.get("model", "stub")
+        if args.error_rate and rng.random() < args.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "stub error"}}, status_code=500)
+
+        n = max(1, int(body.get("n") or 1))
+        choices = [reply_tokens(messages) for _ in range(n)]
+        per_token = 1.0 / args.tokens_per_sec if args.tokens_per_sec > 0 else 0.0
+        created = int(time.time())
+        cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if body.get("stream"):
+            stats["streams"] += 1
+
+            async def events():
+                await asyncio.sleep(prefill_delay(messages))
+                for i, tok in enumerate(choices[0]):
+                    if i:
+                        await asyncio.sleep(per_token)
+                    chunk = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                             "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}]}
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                done = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield f"data: {json.dumps(done)}\n\n"
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    last = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                            "choices": [], "usage": usage(messages, len(choices[0]))}
+                    yield f"data: {json.dumps(last)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        # n 개 후보는 한 배치로 생성된다고 보고 가장 긴 후보 기준으로 기다린다
+        longest = max(len(toks) for toks in choices)
+        await asyncio.sleep(prefill_delay(messages) + per_token * max(0, longest - 1))
+        return {
+            "id": cid,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [
+                {"index": i, "message": {"role": "assistant", "content": "".join(toks)}, "finish_reason": "stop"}
+                for i, toks in enumerate(choices)
+            ],
+            "usage": usage(messages, sum(len(toks) for toks in choices)),
+        }
+
+    return app
+
+
+def parse_args(argv=None):
+    ap = argparse.ArgumentParser(description="OpenAI 호환 스텁 LLM 서버")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=1235)
+    ap.add_argument("--ttft-ms", type=float, default=150, help="첫 토큰까지 기본 지연")
+    ap.add_argument("--prefill-us-per-char", type=float, default=20, help="프롬프트 글자당 추가 prefill 지연(us)")
+    ap.add_argument("--tokens-per-sec", type=float, default=40, help="요청당 생성 속도 (0 이면 즉시)")
+    ap.add_argument("--reply-tokens", type=int, default=0, help="응답 어절 수 상한 (0 이면 문장 전체)")
+    ap.add_argument("--jitter", type=float, default=0.2, help="ttft 에 곱하는 ±비율")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="500 으로 응답할 비율")
+    ap.add_argument("--prefix-cache", type=int, default=0,
+                    help="접두 재사용을 흉내 낼 최근 프롬프트 수 (0 이면 끔)")
+    ap.add_argument("--seed", type=int, default=1)
+    return ap.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    uvicorn.run(build_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# backend/context_window.py — 토큰 예산 안에서 최근 대화부터 채우는 프롬프트 컨텍스트
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 채팅 템플릿이 메시지마다 덧붙이는 토큰 (<|im_start|>role\n … <|im_end|>\n) 근사치
+MESSAGE_OVERHEAD = 4
+TRUNCATION_MARK = " …(이하 생략)"
+
+# 토크나이저가 없을 때 쓰는 추정기 (실제보다 약간 많게 세도록 잡는다)
+#   한글·한자·가나 한 글자 = 1, 영문·숫자 4글자 = 1, 그 밖의 기호 한 글자 = 1, 공백 = 0
+_CJK = "가-힣ㄱ-ㆎ一-鿿぀-ヿ"
+_PIECE_RE = re.compile(rf"[{_CJK}]|[A-Za-z0-9]{{1,4}}|[^\sA-Za-z0-9{_CJK}]")
+
+Encoder = Tuple[Callable[[str], List[int]], Callable[[List[int]], str]]
+
+
+def load_tokenizer(spec: str) -> Optional[Encoder]:
+    """
+    spec: tokenizer.json 경로(tokenizers) 또는 로컬에 받아 둔 HF 모델 이름/디렉터리(transformers).
+    내려받지 않고 로컬 파일만 쓴다. 의존성이 없거나 로드에 실패하면 None.
+    """
+    if not spec:
+        return None
+    try:
+        if spec.endswith(".json"):
+            from tokenizers import Tokenizer
+            tok = Tokenizer.from_file(spec)
+            return (lambda text: tok.encode(text, add_special_tokens=False).ids), tok.decode
+        from transformers import AutoTokenizer
+        tok = AutoTokenizer.from_pretrained(spec, local_files_only=True)
+        return (lambda text: tok.encode(text, add_special_tokens=False)), tok.decode
+    except Exception:
+        return None
+
+
+class TokenCounter:
+    """토크나이저가 있으면 정확히, 없으면 추정기로 센다."""
+
+    def __init__(self, encoder: Optional[Encoder] = None, name: str = "estimate"):
+        self._encoder = encoder
+        self.name = name if encoder is not None else "estimate"
+
+    def count(self, text: str) -> int:
+        if self._encoder is not None:
+            return len(self._encoder[0](text))
+        return len(_PIECE_RE.findall(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """앞에서부터 max_tokens 토큰까지만 남긴다."""
+        if max_tokens <= 0:
+            return ""
+        if self._encoder is not None:
+            encode, decode = self._encoder
+            ids = encode(text)
+            return text if len(ids) <= max_tokens else decode(ids[:max_tokens])
+        end = 0
+        for i, m in enumerate(_PIECE_RE.finditer(text)):
+            if i == max_tokens:
+                return text[:end]
+            end = m.end()
+        return text
+
+
+class ContextWindow:
+    """
+    시스템 프롬프트 + 최근 대화를 budget 토큰 안에 맞춘다.
+    - 메시지 토큰 수는 메시지 dict 의 "tokens" 에 한 번만 계산해 둔다 (세션과 함께 저장)
+    - 가장 최근 메시지부터 거꾸로 채우고, 다 들어가지 않는 메시지는 남은 예산만큼 앞부분을 잘라 넣고 멈춘다
+      (남은 예산이 min_slice 토큰보다 적으면 자르지 않고 버린다. 이번 사용자 발화는 항상 넣는다)
+    - max_messages 를 넘는 옛 메시지는 예산이 남아도 넣지 않는다 (0 이면 제한 없음)
+    돌려주는 메시지에는 role/content 만 담는다.
+    """
+
+    def __init__(self, counter: TokenCounter, budget: int = 3072, max_messages: int = 20, min_slice: int = 32):
+        self.counter = counter
+        self.budget = budget
+        self.max_messages = max_messages
+        self.min_slice = min_slice
+        self._mark_tokens = counter.count(TRUNCATION_MARK)
+        # 시스템 프롬프트는 프로필 조합별로 몇 개뿐이므로 문자열 단위로 기억한다
+        self.system_tokens = lru_cache(maxsize=256)(self._text_tokens)
+        # 지표
+        self.builds = 0
+        self.truncated = 0
+        self.prompt_tokens = 0
+
+    def _text_tokens(self, text: str) -> int:
+        return self.counter.count(text) + MESSAGE_OVERHEAD
+
+    def message_tokens(self, msg: Dict) -> int:
+        n = msg.get("tokens")
+        if n is None:
+            n = msg["tokens"] = self._text_tokens(msg["content"])
+        return n
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """role/content 만 있는 메시지 목록(LLM 요청 본문)의 토큰 수. 시스템 프롬프트는 기억해 둔 값을 쓴다."""
+        return sum(self.system_tokens(m["content"]) if m["role"] == "system" else self._text_tokens(m["content"])
+                   for m in messages)
+
+    def build(self, system_prompt: str, history: List[Dict]) -> List[Dict[str, str]]:
+        used = self.system_tokens(system_prompt)
+        picked: List[Dict[str, str]] = []
+        for msg in reversed(history):
+            if self.max_messages and len(picked) >= self.max_messages:
+                break
+            n = self.message_tokens(msg)
+            if used + n <= self.budget:
+                picked.append({"role": msg["role"], "content": msg["content"]})
+                used += n
+                continue
+            room = self.budget - used - MESSAGE_OVERHEAD - self._mark_tokens
+            if not picked or room >= self.min_slice:
+                # 시스템 프롬프트만으로 예산을 넘겨도 이번 발화는 min_slice 만큼은 넣는다
+                room = max(room, self.min_slice)
+                content = self.counter.truncate(msg["content"], room)
+                if content != msg["content"]:
+                    content += TRUNCATION_MARK
+                    self.truncated += 1
+                picked.append({"role": msg["role"], "content": content})
+                used += self._text_tokens(content)
+            break
+        picked.reverse()
+        self.builds += 1
+        self.prompt_tokens += used
+        return [{"role": "system", "content": system_prompt}] + picked
+
+    def stats(self) -> Dict:
+        return {
+            "tokenizer": self.counter.name,
+            "budget": self.budget,
+            "max_messages": self.max_messages,
+            "builds": self.builds,
+            "truncated": self.truncated,
+            "avg_prompt_tokens": self.prompt_tokens / self.builds if self.builds else 0.0,
+        }
+
+
+def context_from_env() -> ContextWindow:
+    spec = os.getenv("LLM_TOKENIZER", "")
+    return ContextWindow(
+        TokenCounter(load_tokenizer(spec), name=spec),
+        budget=int(os.getenv("LLM_PROMPT_TOKENS", "3072")),
+        max_messages=int(os.getenv("LLM_CONTEXT_MAX_MESSAGES", "20")),
+    )
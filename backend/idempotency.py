@@ -0,0 +1,100 @@
+# backend/idempotency.py — 재전송된 /chat 요청 중복 제거 (멱등 키)
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+# 멱등 키 최대 길이 (클라이언트가 만드는 UUID 정도를 가정)
+IDEMPOTENCY_KEY_MAX = 128
+
+
+class InFlight:
+    """
+    같은 키의 요청이 처리 중이면 새로 처리하지 않고 그 결과를 함께 기다리게 한다 (프로세스 안에서만).
+
+    사용법:
+        fut = INFLIGHT.get(key)
+        if fut is not None:
+            reply = await INFLIGHT.wait(key, fut)   # 먼저 온 요청의 결과(또는 예외)
+        else:
+            fut = INFLIGHT.begin(key)
+            ... INFLIGHT.end(key, fut, result=reply)  # 실패했으면 error=e
+    end() 를 부르지 못한 채 사라진 요청(시작도 못 한 스트림 등)의 키는 max_wait 뒤 기다리던 쪽에서 치운다.
+    """
+
+    def __init__(self, max_wait: float = 60.0):
+        self.max_wait = max_wait
+        self._futures: Dict[Hashable, Tuple[asyncio.Future, float]] = {}
+        # 지표
+        self.joined = 0
+        self.timed_out = 0
+
+    def get(self, key: Hashable) -> Optional[asyncio.Future]:
+        entry = self._futures.get(key)
+        return entry[0] if entry is not None else None
+
+    def begin(self, key: Hashable) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        self._futures[key] = (fut, time.monotonic())
+        return fut
+
+    def end(self, key: Hashable, fut: asyncio.Future, result: Any = None,
+            error: Optional[BaseException] = None) -> None:
+        if not fut.done():
+            if error is None:
+                fut.set_result(result)
+            elif isinstance(error, Exception):
+                fut.set_exception(error)
+                fut.exception()  # 기다리는 쪽이 없어도 "never retrieved" 경고가 나지 않도록
+            else:
+                fut.cancel()
+        entry = self._futures.get(key)
+        if entry is not None and entry[0] is fut:
+            del self._futures[key]
+
+    async def wait(self, key: Hashable, fut: asyncio.Future) -> Any:
+        """먼저 온 요청의 결과를 기다린다. max_wait 를 넘기면 TimeoutError."""
+        self.joined += 1
+        entry = self._futures.get(key)
+        remaining = self.max_wait - (time.monotonic() - entry[1]) if entry is not None else self.max_wait
+        try:
+            # shield: 기다리던 클라이언트가 끊겨도 먼저 온 요청은 계속 진행한다
+            return await asyncio.wait_for(asyncio.shield(fut), timeout=max(0.0, remaining))
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            entry = self._futures.get(key)
+            if entry is not None and entry[0] is fut and time.monotonic() - entry[1] >= self.max_wait:
+                del self._futures[key]
+            raise
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self), "joined": self.joined, "timed_out": self.timed_out}
+
+
+def inflight_from_env() -> InFlight:
+    """CHAT_DUPLICATE_WAIT : 처리 중인 같은 키의 요청을 기다리는 최대 초"""
+    return InFlight(max_wait=float(os.getenv("CHAT_DUPLICATE_WAIT", "90")))
+
+
+# ---- 세션별 최근 응답 창 ----
+# sess["replies"] = [[멱등 키, assistant 응답], ...] (최근 window 개). 세션과 함께 저장되므로
+# sqlite 저장소를 쓰면 다른 워커로 재전송된 요청도 같은 응답을 받는다.
+CHAT_REPLAY_WINDOW = int(os.getenv("CHAT_REPLAY_WINDOW", "8"))
+
+
+def recent_reply(sess: Dict[str, Any], key: str) -> Optional[str]:
+    for k, reply in sess.get("replies", ()):
+        if k == key:
+            return reply
+    return None
+
+
+def remember_reply(sess: Dict[str, Any], key: str, reply: str, window: int = CHAT_REPLAY_WINDOW) -> None:
+    replies: List[List[str]] = sess.setdefault("replies", [])
+    replies.append([key, reply])
+    del replies[:-window]
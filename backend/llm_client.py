@@ -0,0 +1,121 @@
+# backend/llm_client.py — OpenAI 호환 서버용 비동기 HTTP 클라이언트
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+
+class LLMClient:
+    """
+    keep-alive 커넥션 풀을 공유하는 비동기 클라이언트.
+    앱 시작 시 start(), 종료 시 close() 를 호출한다.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        max_connections: int = 32,
+        max_keepalive: int = 16,
+        connect_timeout: float = 5.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        )
+        self._connect_timeout = connect_timeout
+        self._http: Optional[httpx.AsyncClient] = None
+        self.in_flight = 0  # 응답을 기다리거나 스트림을 읽는 중인 요청 수
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        # 키가 비어 있으면(LM Studio 기본 설정) 보내지 않는다: httpx 는 빈 "Bearer " 값을 거부한다
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def start(self) -> None:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=self._limits,
+                timeout=httpx.Timeout(45.0, connect=self._connect_timeout),
+            )
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # lifespan 이 실행되지 않는 환경(Vercel 등)을 위해 지연 생성
+        if self._http is None:
+            self.start()
+        return self._http
+
+    async def chat_completion(self, payload: Dict[str, Any], timeout: float = 45.0) -> Dict[str, Any]:
+        self.in_flight += 1
+        try:
+            r = await self.http.post(
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json=payload,
+                timeout=httpx.Timeout(timeout, connect=self._connect_timeout),
+            )
+            r.raise_for_status()
+            return r.json()
+        finally:
+            self.in_flight -= 1
+
+    async def stream_chat_completion(
+        self, payload: Dict[str, Any], timeout: float = 45.0, usage: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        stream=True 로 요청하고 SSE 로 도착하는 content 조각을 순서대로 내보낸다.
+        usage 에 dict 를 주면 stream_options.include_usage 를 요청하고, 서버가 보낸 usage 블록을 채운다.
+        """
+        body = {**payload, "stream": True}
+        if usage is not None:
+            body["stream_options"] = {"include_usage": True}
+        self.in_flight += 1
+        try:
+            async with self.http.stream(
+                "POST",
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json=body,
+                timeout=httpx.Timeout(timeout, connect=self._connect_timeout),
+            ) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if usage is not None and chunk.get("usage"):
+                        usage.update(chunk["usage"])
+                    choices = chunk.get("choices") or []
+                    if not choices:
+                        continue
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+        finally:
+            self.in_flight -= 1
+
+
+def client_from_env(base_url: str) -> LLMClient:
+    return LLMClient(
+        base_url,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "32")),
+        max_keepalive=int(os.getenv("LLM_MAX_KEEPALIVE", "16")),
+    )
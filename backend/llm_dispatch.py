@@ -0,0 +1,213 @@
+# backend/llm_dispatch.py — 세션 간 LLM 호출 마이크로배칭 디스패처
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+# 숫자가 작을수록 먼저 투입된다
+PRIORITY_CHAT = 0      # 사용자가 기다리는 /chat 턴
+PRIORITY_SUMMARY = 1   # 롤링 요약, /finalize 요약
+
+
+class DispatchOverloaded(Exception):
+    """대기열이 가득 찼거나(queue_full) 대기 시한을 넘긴(queue_timeout) 요청"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"LLM dispatcher overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "admitted", "enqueued_at")
+
+    def __init__(self, priority: int, seq: int, admitted: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.admitted = admitted
+        self.enqueued_at = time.perf_counter()
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class LLMDispatcher:
+    """
+    모든 세션의 LLM 호출을 한 큐에 모아 웨이브 단위로 LLM 서버에 투입한다.
+    - 동시에 실행 중인 호출은 max_in_flight 개로 제한
+    - 큐가 비어 있다가 요청이 오면 batch_window 동안 더 모아 한 웨이브로 같이 보낸다
+      (로컬 추론 서버는 함께 도착한 요청을 배치로 처리할 때 처리량이 높다)
+    - 빈 슬롯은 우선순위(PRIORITY_CHAT → PRIORITY_SUMMARY), 같은 우선순위는 도착 순으로 채운다
+    - 대기열은 max_queue 개까지만 받고(넘치면 바로 DispatchOverloaded), 대기는 queue_timeout 초까지만 한다
+
+    사용법:
+        async with DISPATCH.slot(PRIORITY_CHAT):
+            data = await LLM.chat_completion(...)
+    """
+
+    def __init__(self, max_in_flight: int = 8, batch_window: float = 0.005, enabled: bool = True,
+                 max_queue: int = 0, queue_timeout: float = 0.0):
+        self.max_in_flight = max_in_flight
+        self.batch_window = batch_window
+        self.enabled = enabled
+        self.max_queue = max_queue          # 0 이면 제한 없음
+        self.queue_timeout = queue_timeout  # 0 이면 제한 없음
+        self._heap: List[_Job] = []
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self._arrived: Optional[asyncio.Event] = None
+        self._slot_freed: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # 지표
+        self.admitted = 0
+        self.waves = 0
+        self.wait_seconds_total = 0.0
+        self.admitted_by_priority: Dict[int, int] = {}
+        self.rejected = 0
+        self.timed_out = 0
+        self._hold_ema: Optional[float] = None  # 슬롯 점유 시간 지수 이동 평균 (Retry-After 추정용)
+
+    # -- 수명주기 ---------------------------------------------------------------
+    def start(self) -> None:
+        if not self.enabled or (self._task is not None and not self._task.done()):
+            return
+        self._arrived = asyncio.Event()
+        self._slot_freed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for job in self._heap:
+            if not job.admitted.done():
+                job.admitted.cancel()
+        self._heap.clear()
+
+    # -- 투입 ------------------------------------------------------------------
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_CHAT) -> AsyncIterator[None]:
+        """투입 차례가 올 때까지 기다렸다가, 블록이 끝날 때 슬롯을 반납한다."""
+        if not self.enabled:
+            yield
+            return
+        self.start()  # lifespan 이 없는 환경을 위해 지연 시작
+        self.check_admission()
+
+        job = _Job(priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._heap, job)
+        self._arrived.set()
+        try:
+            if self.queue_timeout > 0:
+                await asyncio.wait((job.admitted,), timeout=self.queue_timeout)
+                if not job.admitted.done():
+                    job.admitted.cancel()
+                    self.timed_out += 1
+                    raise DispatchOverloaded("queue_timeout", self.retry_after())
+            else:
+                await job.admitted
+        except asyncio.CancelledError:
+            # 투입과 동시에 취소된 경우 슬롯을 돌려준다
+            if job.admitted.done() and not job.admitted.cancelled():
+                self._release()
+            else:
+                job.admitted.cancel()
+            raise
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - t0)
+
+    def _release(self, held: Optional[float] = None) -> None:
+        self._in_flight -= 1
+        self._slot_freed.set()
+        if held is not None:
+            self._hold_ema = held if self._hold_ema is None else 0.9 * self._hold_ema + 0.1 * held
+
+    async def _run(self) -> None:
+        while True:
+            while self._in_flight >= self.max_in_flight:
+                self._slot_freed.clear()
+                await self._slot_freed.wait()
+
+            if not self._heap:
+                self._arrived.clear()
+                await self._arrived.wait()
+                if self.batch_window > 0:
+                    # 같은 웨이브로 묶을 요청을 잠깐 더 모은다
+                    await asyncio.sleep(self.batch_window)
+
+            launched = 0
+            now = time.perf_counter()
+            while self._heap and self._in_flight < self.max_in_flight:
+                job = heapq.heappop(self._heap)
+                if job.admitted.done():  # 기다리다 취소된 요청
+                    continue
+                job.admitted.set_result(None)
+                self._in_flight += 1
+                launched += 1
+                self.admitted += 1
+                self.admitted_by_priority[job.priority] = self.admitted_by_priority.get(job.priority, 0) + 1
+                self.wait_seconds_total += now - job.enqueued_at
+            if launched:
+                self.waves += 1
+
+    # -- 지표 ------------------------------------------------------------------
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for job in self._heap if not job.admitted.done())
+
+    @property
+    def saturated(self) -> bool:
+        """대기열이 가득 차 새 요청을 받을 수 없는 상태"""
+        return self.enabled and self.max_queue > 0 and self.queued >= self.max_queue
+
+    def check_admission(self) -> None:
+        """대기열이 가득 찼으면 DispatchOverloaded. 요청을 처리하기 전에 미리 거절할 때도 쓴다."""
+        if self.saturated:
+            self.rejected += 1
+            raise DispatchOverloaded("queue_full", self.retry_after())
+
+    def retry_after(self) -> float:
+        """지금 대기열이 빠지는 데 걸릴 시간 추정 (초, 최소 1)"""
+        hold = self._hold_ema or 1.0
+        return max(1.0, math.ceil(hold * (self.queued + 1) / max(1, self.max_in_flight)))
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "max_in_flight": self.max_in_flight,
+            "batch_window_ms": self.batch_window * 1000,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "admitted_by_priority": dict(self.admitted_by_priority),
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "waves": self.waves,
+            "avg_wave_size": self.admitted / self.waves if self.waves else 0.0,
+            "avg_queue_wait_ms": self.wait_seconds_total / self.admitted * 1000 if self.admitted else 0.0,
+        }
+
+
+def dispatcher_from_env() -> LLMDispatcher:
+    return LLMDispatcher(
+        max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+        batch_window=float(os.getenv("LLM_BATCH_WINDOW_MS", "5")) / 1000,
+        enabled=os.getenv("LLM_DISPATCH", "1") != "0",
+        max_queue=int(os.getenv("LLM_MAX_QUEUE", "64")),
+        queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+    )
@@ -0,0 +1,210 @@
+# backend/llm_guard.py — LLM 서버 장애 격리 (서킷 브레이커 / 적응형 타임아웃)
+from __future__ import annotations
+
+import math
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterator, Optional, Tuple
+
+import httpx
+
+CLOSED = "closed"        # 정상: 모든 호출 통과
+OPEN = "open"            # 차단: 호출하지 않고 바로 CircuitOpen (호출부는 대체 응답)
+HALF_OPEN = "half_open"  # 시험: 호출 하나만 보내 보고 성공하면 닫고 실패하면 다시 연다
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"LLM circuit open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def is_backend_failure(e: BaseException) -> bool:
+    """서버 쪽 장애로 볼 예외 (시간 초과, 연결 실패, 5xx). 4xx·파싱 오류는 세지 않는다."""
+    if isinstance(e, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500
+    return False
+
+
+class CircuitBreaker:
+    """
+    연속 failure_threshold 번 실패하면 열리고, reset_timeout 초 뒤 시험 호출 하나를 허용한다(half-open).
+    시험 호출이 성공하면 닫히고, 실패하면 다시 reset_timeout 동안 열린다.
+
+    사용법:
+        with BREAKER.guard():
+            data = await LLM.chat_completion(...)
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 is_failure: Callable[[BaseException], bool] = is_backend_failure,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_failure = is_failure
+        self._clock = clock
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # 지표
+        self.opened = 0
+        self.short_circuited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        if not self.enabled or self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self._clock() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = HALF_OPEN
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        self.state = CLOSED
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        was_probe = self._probe_in_flight
+        self._probe_in_flight = False
+        if self.enabled and (was_probe or self.consecutive_failures >= self.failure_threshold):
+            if self.state != OPEN:
+                self.opened += 1
+            self.state = OPEN
+            self._opened_at = self._clock()
+
+    def release(self) -> None:
+        """성공도 실패도 아닌 채로 끝난 호출(취소, 대기열 거절 등). 시험 호출이었다면 기회를 돌려준다."""
+        self._probe_in_flight = False
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        if not self.allow():
+            self.short_circuited += 1
+            raise CircuitOpen(self.retry_after())
+        try:
+            yield
+        except BaseException as e:
+            if self.is_failure(e):
+                self.record_failure()
+            else:
+                self.release()
+            raise
+        self.record_success()
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "retry_after": self.retry_after(),
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class AdaptiveTimeout:
+    """
+    최근 성공한 호출 window 개의 p95 × multiplier 를 타임아웃으로 쓴다 ([min_timeout, 호출부 상한] 으로 제한).
+    표본이 min_samples 개 미만이면 호출부 상한을 그대로 쓴다. p95 는 refresh_every 번 관측마다 다시 계산한다.
+    """
+
+    def __init__(self, multiplier: float = 3.0, min_timeout: float = 5.0, window: int = 200,
+                 min_samples: int = 20, refresh_every: int = 10):
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._since_refresh = 0
+        self._p95: Optional[float] = None
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._since_refresh += 1
+        if len(self._samples) >= self.min_samples and (self._p95 is None or self._since_refresh >= self.refresh_every):
+            xs = sorted(self._samples)
+            self._p95 = xs[min(len(xs) - 1, math.ceil(0.95 * len(xs)) - 1)]
+            self._since_refresh = 0
+
+    def timeout(self, ceiling: float) -> float:
+        if self._p95 is None:
+            return ceiling
+        return min(ceiling, max(self.min_timeout, self._p95 * self.multiplier))
+
+    @contextmanager
+    def track(self, ceiling: float) -> Iterator[float]:
+        """
+        지금 쓸 타임아웃을 내주고 걸린 시간을 기록한다.
+        시간 초과도 '적어도 그만큼 걸렸다'는 표본으로 넣어, 서버가 실제로 느려지면 타임아웃도 상한까지 따라 늘어난다.
+        """
+        limit = self.timeout(ceiling)
+        t0 = time.perf_counter()
+        try:
+            yield limit
+        except httpx.TimeoutException:
+            self.observe(limit)
+            raise
+        self.observe(time.perf_counter() - t0)
+
+    @contextmanager
+    def track_stream(self, ceiling: float) -> Iterator[Tuple[float, Callable[[], None]]]:
+        """
+        스트림용 track(). 스트림의 타임아웃은 조각을 읽을 때마다 따로 걸리므로 (첫 조각까지 기다리는 시간이 가장 길다)
+        전체 스트림 시간이 아니라 첫 조각까지의 시간을 기록한다. 호출부는 첫 조각을 받으면 first_chunk() 를 부른다.
+        """
+        limit = self.timeout(ceiling)
+        t0 = time.perf_counter()
+        seen = False
+
+        def first_chunk() -> None:
+            nonlocal seen
+            if not seen:
+                seen = True
+                self.observe(time.perf_counter() - t0)
+
+        try:
+            yield limit, first_chunk
+        except httpx.TimeoutException:
+            self.observe(limit)
+            raise
+
+    def stats(self) -> Dict:
+        return {
+            "samples": len(self._samples),
+            "p95": self._p95,
+            "timeout": self.timeout(math.inf) if self._p95 is not None else None,  # 호출부 상한 적용 전
+        }
+
+
+def breaker_from_env() -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+        reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")),
+    )
+
+
+def adaptive_timeout_from_env() -> AdaptiveTimeout:
+    return AdaptiveTimeout(
+        multiplier=float(os.getenv("LLM_TIMEOUT_MULTIPLIER", "3")),
+        min_timeout=float(os.getenv("LLM_TIMEOUT_MIN", "5")),
+    )
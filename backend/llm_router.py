@@ -0,0 +1,189 @@
+# backend/llm_router.py — 여러 OpenAI 호환 서버에 LLM 호출을 나눠 보내는 라우터
+from __future__ import annotations
+
+import os
+import time
+import zlib
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional
+
+import httpx
+
+try:
+    from backend.llm_client import LLMClient, client_from_env
+    from backend.llm_guard import is_backend_failure
+except ModuleNotFoundError:
+    from llm_client import LLMClient, client_from_env
+    from llm_guard import is_backend_failure
+
+
+class Endpoint:
+    """서버 하나. 처리 중인 요청 수와 최근 지연·오류, 격리(ejection) 상태를 들고 있다."""
+
+    def __init__(self, client: LLMClient, window: int = 200):
+        self.client = client
+        self.url = client.base_url
+        self.outstanding = 0
+        self.requests = 0
+        self.errors = 0
+        self.ejections = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self._latency: Deque[float] = deque(maxlen=window)
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        xs = sorted(self._latency)
+        pct = lambda q: xs[min(len(xs) - 1, int(q * len(xs)))] if xs else None  # noqa: E731
+        return {
+            "url": self.url,
+            "healthy": self.healthy(now),
+            "ejected_for": max(0.0, self.ejected_until - now),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "ejections": self.ejections,
+            "latency_p50": pct(0.5),
+            "latency_p95": pct(0.95),
+        }
+
+
+class LLMRouter:
+    """
+    LLMClient 와 같은 인터페이스로 여러 서버에 호출을 분산한다.
+    - 처리 중인 요청이 가장 적은 서버로 보낸다 (같으면 앞쪽 서버)
+    - 수동 헬스체크: 연속 eject_after 번 실패(시간 초과·연결 실패·5xx)한 서버는 eject_seconds 동안 제외
+      (모든 서버가 제외되면 가장 먼저 풀리는 서버로 보낸다)
+    - sticky=True 면 같은 세션은 같은 서버로 보내 접두(prefix) 캐시를 재사용한다 (렌데부 해싱).
+      그 서버의 처리 중 요청이 가장 한가한 서버보다 sticky_slack 개 넘게 많으면 한가한 서버로 보낸다
+    - 연결 단계에서 실패한 요청(서버가 받지 못한 요청)은 다른 서버로 한 번 더 보낸다 (비스트리밍)
+    """
+
+    def __init__(self, clients: List[LLMClient], eject_after: int = 3, eject_seconds: float = 30.0,
+                 sticky: bool = False, sticky_slack: int = 4,
+                 observer: Optional[Callable[[str, float, bool], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if not clients:
+            raise ValueError("at least one LLM endpoint is required")
+        self.endpoints = [Endpoint(c) for c in clients]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.sticky = sticky
+        self.sticky_slack = sticky_slack
+        self.observer = observer  # (url, 걸린 시간, 성공 여부) — 지표 연동용
+        self._clock = clock
+
+    # -- 수명주기 ---------------------------------------------------------------
+    def start(self) -> None:
+        for ep in self.endpoints:
+            ep.client.start()
+
+    async def close(self) -> None:
+        for ep in self.endpoints:
+            await ep.client.close()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(ep.client.in_flight for ep in self.endpoints)
+
+    # -- 선택 ------------------------------------------------------------------
+    def pick(self, session_key: Optional[str] = None, exclude: Optional[Endpoint] = None) -> Endpoint:
+        now = self._clock()
+        candidates = [ep for ep in self.endpoints if ep is not exclude] or self.endpoints
+        live = [ep for ep in candidates if ep.healthy(now)]
+        if not live:
+            return min(candidates, key=lambda ep: ep.ejected_until)
+        least = min(live, key=lambda ep: ep.outstanding)
+        if self.sticky and session_key and len(live) > 1:
+            key = session_key.encode("utf-8")
+            home = max(live, key=lambda ep: zlib.crc32(key + ep.url.encode("utf-8")))
+            if home.outstanding - least.outstanding <= self.sticky_slack:
+                return home
+        return least
+
+    # -- 결과 기록 --------------------------------------------------------------
+    def _record(self, ep: Endpoint, seconds: float, error: Optional[BaseException]) -> None:
+        ep.requests += 1
+        if error is None:
+            ep.consecutive_failures = 0
+            ep._latency.append(seconds)
+        elif is_backend_failure(error):
+            ep.errors += 1
+            ep.consecutive_failures += 1
+            now = self._clock()
+            if self.eject_after > 0 and ep.consecutive_failures >= self.eject_after:
+                if ep.healthy(now):  # 이미 제외된 동안 끝난 요청은 제외 횟수로 세지 않는다
+                    ep.ejections += 1
+                ep.ejected_until = now + self.eject_seconds
+                ep.consecutive_failures = 0
+        else:
+            return  # 취소·4xx 는 서버 상태와 무관
+        if self.observer is not None:
+            self.observer(ep.url, seconds, error is None)
+
+    # -- 호출 ------------------------------------------------------------------
+    async def chat_completion(self, payload: Dict[str, Any], timeout: float = 45.0,
+                              session_key: Optional[str] = None) -> Dict[str, Any]:
+        ep = self.pick(session_key)
+        tried = 1
+        while True:
+            ep.outstanding += 1
+            t0 = time.perf_counter()
+            try:
+                data = await ep.client.chat_completion(payload, timeout=timeout)
+            except BaseException as e:
+                ep.outstanding -= 1
+                self._record(ep, time.perf_counter() - t0, e)
+                if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)) and tried < len(self.endpoints):
+                    ep = self.pick(session_key, exclude=ep)
+                    tried += 1
+                    continue
+                raise
+            ep.outstanding -= 1
+            self._record(ep, time.perf_counter() - t0, None)
+            return data
+
+    async def stream_chat_completion(self, payload: Dict[str, Any], timeout: float = 45.0,
+                                     session_key: Optional[str] = None,
+                                     usage: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        ep = self.pick(session_key)
+        ep.outstanding += 1
+        t0 = time.perf_counter()
+        error: Optional[BaseException] = None
+        try:
+            async for delta in ep.client.stream_chat_completion(payload, timeout=timeout, usage=usage):
+                yield delta
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            ep.outstanding -= 1
+            self._record(ep, time.perf_counter() - t0, error)
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        return {
+            "sticky": self.sticky,
+            "eject_after": self.eject_after,
+            "eject_seconds": self.eject_seconds,
+            "endpoints": [ep.stats(now) for ep in self.endpoints],
+        }
+
+
+def router_from_env(base_urls: str, observer: Optional[Callable[[str, float, bool], None]] = None) -> LLMRouter:
+    """
+    base_urls: 쉼표로 구분한 OpenAI 호환 서버 주소 목록 (OPENAI_BASE)
+    LLM_MAX_CONNECTIONS / LLM_MAX_KEEPALIVE 는 서버별 커넥션 풀 크기
+    """
+    clients = [client_from_env(url.strip()) for url in base_urls.split(",") if url.strip()]
+    return LLMRouter(
+        clients,
+        eject_after=int(os.getenv("LLM_EJECT_AFTER", "3")),
+        eject_seconds=float(os.getenv("LLM_EJECT_SECONDS", "30")),
+        sticky=os.getenv("LLM_STICKY_SESSIONS", "0") == "1",
+        sticky_slack=int(os.getenv("LLM_STICKY_SLACK", "4")),
+        observer=observer,
+    )
@@ -0,0 +1,195 @@
+# backend/metrics.py — 의존성 없는 경량 Prometheus 지표 (텍스트 노출 형식 0.0.4)
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 지표는 이벤트 루프에서 갱신하고 /metrics 는 스레드풀에서 노출하므로 render() 는 잠금 없이
+# 라벨 dict 의 복사본(list(d.items()), GIL 아래 한 번에 복사됨)을 돌며 쓴다.
+# 그 사이 새 라벨이 생겨도 "dictionary changed size during iteration" 이 나지 않는다.
+
+# 단계별 지연은 수 us(pii_mask)부터 수십 초(LLM 생성)까지 걸치므로 범위를 넓게 잡는다
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    if v == math.inf:
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _Timer:
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._child.observe(time.perf_counter() - self._t0)
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """
+    버킷별 개수는 누적이 아닌 칸별로 세고, 노출할 때만 누적한다 (observe 는 이분 탐색 한 번).
+    이벤트 루프 스레드에서만 갱신한다고 보고 잠금을 두지 않는다.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[LabelValues, _HistogramChild] = {}
+
+    def labels(self, *values: str) -> _HistogramChild:
+        child = self._children.get(values)
+        if child is None:
+            child = self._children[values] = _HistogramChild(self.buckets)
+        return child
+
+    def observe(self, value: float, *values: str) -> None:
+        self.labels(*values).observe(value)
+
+    def time(self, *values: str) -> _Timer:
+        return _Timer(self.labels(*values))
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, child in sorted(list(self._children.items())):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), list(child.counts)):
+                cumulative += n
+                le = f'le="{_num(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_num(child.sum)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, *values: str) -> None:
+        self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for values, v in sorted(list(self._values.items())):
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_num(v)}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """
+    노출 시점에 fn() 으로 값을 읽는 지표 (이미 다른 곳에서 세고 있는 값을 요청 경로 비용 없이 내보낼 때).
+    fn 은 숫자 하나, 또는 {라벨 값 튜플: 숫자} dict 를 돌려준다.
+    """
+
+    def __init__(self, name: str, help: str, kind: str,
+                 fn: Callable[[], Union[float, Dict[LabelValues, float]]], labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self.kind = kind
+        self._fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            value = self._fn()
+        except Exception:
+            return []
+        lines = self.header()
+        items = sorted(list(value.items())) if isinstance(value, dict) else [((), value)]
+        for values, v in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, values)} {_num(v)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge_fn(self, name: str, help: str, fn: Callable, labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, "gauge", fn, labelnames))
+
+    def counter_fn(self, name: str, help: str, fn: Callable, labelnames: Sequence[str] = ()) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, "counter", fn, labelnames))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in list(self._metrics):
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
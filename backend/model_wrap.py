@@ -1,25 +1,189 @@
 # backend/model_wrap.py
-from typing import Optional, List
-def try_load_model():
-    try:
-        from transformers import pipeline
-        # 멀티링구얼/간단 모델 예시(정확도는 제한적, 데모용)
-        clf = pipeline("sentiment-analysis")  # 모델 미지정 시 기본 가중치 다운로드
-        return clf
-    except Exception:
-        return None
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, List, Tuple
+
+
+def _load_pipeline(backend: str, model_name: Optional[str]):
+    from transformers import pipeline
+
+    if backend == "onnx":
+        # optimum[onnxruntime] 가 있으면 ONNX Runtime CPU 추론
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer
+        name = model_name or "distilbert-base-uncased-finetuned-sst-2-english"
+        model = ORTModelForSequenceClassification.from_pretrained(name, export=True)
+        return pipeline("sentiment-analysis", model=model, tokenizer=AutoTokenizer.from_pretrained(name))
+
+    # 멀티링구얼/간단 모델 예시(정확도는 제한적, 데모용)
+    clf = pipeline("sentiment-analysis", model=model_name)  # 모델 미지정 시 기본 가중치 다운로드
+    if backend == "quantized":
+        # Linear 층 동적 int8 양자화 (CPU 전용)
+        import torch
+        clf.model = torch.quantization.quantize_dynamic(clf.model, {torch.nn.Linear}, dtype=torch.qint8)
+    return clf
+
+
+def try_load_model(backend: str = "torch", model_name: Optional[str] = None):
+    """
+    backend: "torch" | "quantized" | "onnx" | "auto"(onnx → quantized → torch 순으로 시도)
+    의존성이 없거나 로드에 실패하면 None.
+    """
+    for b in (("onnx", "quantized", "torch") if backend == "auto" else (backend,)):
+        try:
+            return _load_pipeline(b, model_name)
+        except Exception:
+            continue
+    return None
+
+
+def _neg_ratio(outs) -> float:
+    # 긍/부정 비율로 간단 점수화(부정↑ → 우울/불안에 소량 가중)
+    neg = sum(1 for o in outs if 'NEG' in o['label'].upper() or '1' in o['label'])  # 모델에 따라 라벨 다름
+    total = max(1, len(outs))
+    return neg / total
+
 
 def model_scores(clf, messages: List[str]) -> Optional[dict]:
-    if clf is None: 
+    if clf is None:
         return None
     try:
         # 최근 메시지 몇 개만 샘플링
         sample = messages[-5:] if len(messages) > 5 else messages
         outs = clf(sample)
-        # 긍/부정 비율로 간단 점수화(부정↑ → 우울/불안에 소량 가중)
-        neg = sum(1 for o in outs if 'NEG' in o['label'].upper() or '1' in o['label'])  # 모델에 따라 라벨 다름
-        total = max(1, len(outs))
-        neg_ratio = neg / total
-        return {"neg_ratio": neg_ratio}
+        return {"neg_ratio": _neg_ratio(outs)}
     except Exception:
         return None
+
+
+class SentimentEngine:
+    """
+    CPU 감성 분류 엔진.
+    - start(): 백그라운드 스레드에서 모델을 로드하므로 첫 요청을 막지 않는다 (로드 전에는 None 반환)
+    - neg_ratio(): 동시에 들어온 /finalize 요청들을 batch_window 동안 모아 한 번의 배치로 분류한다
+    """
+
+    def __init__(self, backend: str = "auto", model_name: Optional[str] = None,
+                 max_batch: int = 64, batch_window: float = 0.01):
+        self.backend = backend
+        self.model_name = model_name
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._clf = None
+        self._ready = threading.Event()
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._clf is not None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sentiment-engine", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+
+    def _run(self) -> None:
+        t0 = time.perf_counter()
+        self._clf = try_load_model(self.backend, self.model_name)
+        self.load_seconds = time.perf_counter() - t0
+        if self._clf is None:
+            self.error = "model unavailable"
+            print(f"[sentiment] load failed after {self.load_seconds:.1f}s (backend={self.backend})")
+        else:
+            print(f"[sentiment] ready in {self.load_seconds:.1f}s (backend={self.backend})")
+        self._ready.set()
+
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            size = len(item[0])
+            deadline = time.perf_counter() + self.batch_window
+            while size < self.max_batch:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+                size += len(nxt[0])
+            self._classify_batch(batch)
+
+    def _classify_batch(self, batch: List[Tuple[List[str], Future]]) -> None:
+        # 시간 초과로 이미 취소된 요청은 건너뛴다 (실행 중으로 표시된 Future 는 더 이상 취소되지 않음)
+        batch = [(texts, fut) for texts, fut in batch if fut.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [t for texts, _ in batch for t in texts]
+        try:
+            if self._clf is None:
+                raise RuntimeError(self.error or "model not loaded")
+            t0 = time.perf_counter()
+            outs = self._clf(texts, batch_size=min(len(texts), self.max_batch), truncation=True)
+            self.busy_seconds += time.perf_counter() - t0
+            self.batches += 1
+            self.items += len(texts)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        i = 0
+        for texts_, fut in batch:
+            fut.set_result(outs[i:i + len(texts_)])
+            i += len(texts_)
+
+    async def neg_ratio(self, messages: List[str], timeout: float = 2.0) -> Optional[float]:
+        """최근 5개 메시지의 부정 비율. 모델이 준비되지 않았거나 실패/시간 초과면 None."""
+        sample = messages[-5:]
+        if not sample or not self.ready:
+            return None
+        fut: Future = Future()
+        self._queue.put((sample, fut))
+        try:
+            outs = await asyncio.wait_for(asyncio.wrap_future(fut), timeout)
+            return _neg_ratio(outs)
+        except Exception:
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "ready": self.ready,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "items_per_sec": self.items / self.busy_seconds if self.busy_seconds else 0.0,
+        }
+
+
+def engine_from_env() -> Optional[SentimentEngine]:
+    """SENTIMENT_ENABLED=1 일 때만 엔진을 만든다 (transformers 등 선택 의존성)."""
+    if os.getenv("SENTIMENT_ENABLED", "0") != "1":
+        return None
+    return SentimentEngine(
+        backend=os.getenv("SENTIMENT_BACKEND", "auto"),
+        model_name=os.getenv("SENTIMENT_MODEL") or None,
+        max_batch=int(os.getenv("SENTIMENT_MAX_BATCH", "64")),
+        batch_window=float(os.getenv("SENTIMENT_BATCH_WINDOW_MS", "10")) / 1000,
+    )
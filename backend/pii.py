@@ -0,0 +1,153 @@
+# backend/pii.py — PII 마스킹(보수적)
+import os
+import re
+from typing import Iterator, List, NamedTuple, Tuple
+
+PHONE_RE = re.compile(r"(01[016789]|02|0[3-9]\d)-?\d{3,4}-?\d{4}")
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# 이름은 '님/씨' 호칭이 붙은 경우만 치환
+NAME_RE  = re.compile(r'(?<![가-힣])([가-힣]{2,4})(님|씨)(?=\s|$)')
+
+PLACEHOLDERS = {"phone": "<PHONE>", "email": "<EMAIL>", "name": "<NAME>"}
+
+# 이 길이를 넘는 입력은 공백 경계에서 나눈 구간 단위로 훑는다 (세 패턴 모두 공백을 포함하지 않으므로
+# 공백 바로 뒤에서 자르면 구간을 걸치는 매치가 생기지 않는다)
+PII_CHUNK_CHARS = int(os.getenv("PII_CHUNK_CHARS", "8192"))
+# /chat 입력 상한 (0 이면 제한 없음)
+PII_MAX_INPUT_CHARS = int(os.getenv("PII_MAX_INPUT_CHARS", "20000"))
+
+_LAST_WS_RE = re.compile(r".*\s", re.S)
+_WS_RE = re.compile(r"\s")
+_EMAIL_LOCAL = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-")
+
+
+class PiiSpan(NamedTuple):
+    kind: str   # phone | email | name
+    start: int  # 마스킹된 텍스트 기준 위치 (자리표시자 구간)
+    end: int
+
+
+class PiiScan(NamedTuple):
+    text: str
+    spans: List[PiiSpan]
+
+
+class PiiInputTooLarge(ValueError):
+    def __init__(self, length: int, max_chars: int):
+        super().__init__(f"input is {length} chars, limit is {max_chars}")
+        self.length = length
+        self.max_chars = max_chars
+
+
+def _windows(text: str, chunk: int) -> Iterator[Tuple[int, int]]:
+    n = len(text)
+    a = 0
+    while a < n:
+        b = a + chunk
+        if chunk <= 0 or b >= n:
+            yield a, n
+            return
+        m = _LAST_WS_RE.match(text, a, b)  # 구간 안의 마지막 공백 바로 뒤에서 자른다
+        if m is None:
+            m = _WS_RE.search(text, b)     # 공백 없는 긴 덩어리는 다음 공백까지 늘린다
+            b = m.end() if m else n
+        else:
+            b = m.end()
+        yield a, b
+        a = b
+
+
+def _find_emails(text: str, a: int, b: int, out: List[Tuple[int, int, str]]) -> None:
+    """
+    EMAIL_RE.finditer(text, a, b) 와 같은 결과를 '@' 위치에서 출발해 찾는다.
+    로컬 부분에는 '@' 가 없으므로 '@' 하나당 가능한 시작은 그 앞 로컬 문자열의 시작 하나뿐이다.
+    """
+    lo = a
+    at = text.find("@", a, b)
+    while at >= 0:
+        s = at
+        while s > lo and text[s - 1] in _EMAIL_LOCAL:
+            s -= 1
+        m = EMAIL_RE.match(text, s, b) if s < at else None
+        if m is not None:
+            out.append((s, m.end(), "email"))
+            lo = m.end()
+            at = text.find("@", lo, b)
+        else:
+            at = text.find("@", at + 1, b)
+
+
+def _find_names(text: str, a: int, b: int, out: List[Tuple[int, int, str]]) -> None:
+    """
+    NAME_RE.finditer(text, a, b) 와 같은 결과를 '님/씨' 위치에서 출발해 찾는다.
+    호칭 뒤가 공백(또는 끝)이면 그 앞 한글 덩어리의 시작을 후보로 잡고 NAME_RE.match 로 확인한다
+    (이름 길이·앞뒤 경계 같은 규칙은 NAME_RE 에만 둔다).
+    """
+    n = len(text)
+    for suffix in "님씨":
+        i = text.find(suffix, a, b)
+        while i >= 0:
+            if i + 1 == n or text[i + 1].isspace():
+                s = i
+                while s > a and "가" <= text[s - 1] <= "힣":
+                    s -= 1
+                m = NAME_RE.match(text, s, b)
+                if m is not None:
+                    out.append((s, m.end(), "name"))
+            i = text.find(suffix, i + 1, b)
+
+
+def _find(text: str, a: int, b: int, out: List[Tuple[int, int, str]]) -> None:
+    """
+    [a, b) 구간의 매치를 원문 위치로 모은다. 기존의 순차 치환과 결과를 맞추기 위해
+    - 전화번호를 먼저 찾고, 이메일은 전화번호 사이 구간에서만 찾는다
+      (치환된 <PHONE> 은 이메일 문자가 아니므로 순차 치환에서도 이메일이 그 자리를 넘지 못한다)
+    - 이름(한글+님/씨)은 전화번호·이메일과 문자 집합이 겹치지 않아 원문에서 바로 찾는다
+    이메일·이름은 드문 앵커 문자('@', '님/씨')에서만 정규식을 맞춰 보므로 긴 입력에서도 전체를 다시 훑지 않는다.
+    """
+    gap = a
+    for m in PHONE_RE.finditer(text, a, b):
+        _find_emails(text, gap, m.start(), out)
+        out.append((m.start(), m.end(), "phone"))
+        gap = m.end()
+    _find_emails(text, gap, b, out)
+    _find_names(text, a, b, out)
+
+
+def pii_scan(text: str, max_chars: int = 0, chunk_chars: int = PII_CHUNK_CHARS) -> PiiScan:
+    """
+    전화번호·이메일·이름을 한 번에 찾아 마스킹한 텍스트와 자리표시자 위치(종류별)를 돌려준다.
+    중간 문자열 없이 원문에서 찾은 구간으로 결과를 한 번만 조립한다. max_chars 를 넘으면 PiiInputTooLarge.
+    """
+    if max_chars and len(text) > max_chars:
+        raise PiiInputTooLarge(len(text), max_chars)
+    # 흔한 경우(개인정보 없음)는 정규식을 돌리지 않는다: 전화번호는 항상 '0', 이메일은 '@', 이름은 '님/씨' 를 포함
+    if "0" not in text and "@" not in text and "님" not in text and "씨" not in text:
+        return PiiScan(text, [])
+
+    found: List[Tuple[int, int, str]] = []
+    for a, b in _windows(text, chunk_chars):
+        _find(text, a, b, found)
+    if not found:
+        return PiiScan(text, [])
+    found.sort()
+
+    parts: List[str] = []
+    spans: List[PiiSpan] = []
+    pos = 0
+    out_len = 0
+    for start, end, kind in found:
+        if start > pos:
+            parts.append(text[pos:start])
+            out_len += start - pos
+        token = PLACEHOLDERS[kind]
+        parts.append(token)
+        spans.append(PiiSpan(kind, out_len, out_len + len(token)))
+        out_len += len(token)
+        pos = end
+    parts.append(text[pos:])
+    return PiiScan("".join(parts), spans)
+
+
+def pii_mask(text: str) -> str:
+    return pii_scan(text).text
@@ -0,0 +1,205 @@
+# backend/report_jobs.py — /finalize 리포트를 백그라운드 워커에서 만들고 job_id 로 찾아가게 하는 작업 큐
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+try:
+    from backend.session_store import SessionStore, store_from_env
+except ModuleNotFoundError:
+    from session_store import SessionStore, store_from_env
+
+PENDING = "pending"
+DONE = "done"
+ERROR = "error"
+
+
+class JobQueueFull(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("report job queue is full")
+        self.retry_after = retry_after
+
+
+# job_id 는 uuid4().hex. 같은 store 에 둔 owner 연결(owner:<sid>)을 /report 로 읽지 못하도록 fetch 는 이 모양만 받는다
+_JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+def _owner_key(owner: str) -> str:
+    # job_id 는 uuid hex 라 접두어가 붙은 키와 겹치지 않는다
+    return f"owner:{owner}"
+
+
+class ReportJobs:
+    """
+    리포트 작성 함수를 workers 개의 asyncio 워커에 맡기고 job_id 를 바로 돌려준다.
+    - 작업 상태/결과는 store 에 {"status": pending|done|error, "report": ...} 로 둔다
+      (store 의 TTL·최대 개수가 그대로 적용되므로 찾아가지 않은 리포트도 곧 사라진다)
+    - 끝난 결과는 처음 읽을 때 지운다 (리포트를 서버에 남기지 않는다)
+    - 대기 중인 작업은 max_pending 개까지만 받는다 (넘치면 JobQueueFull)
+    - owner(세션 id)를 주면 owner → job_id 도 같은 store 에 둔다. 리포트 작업이 세션을 지운 뒤에도
+      같은 owner 의 재요청이 결과가 남아 있는 작업을 다시 찾을 수 있다 (job_of)
+    - submit_once 는 owner 당 작업을 하나만 예약한다 (동시에 온 같은 owner 의 요청은 같은 job_id 를 받음)
+    store 를 sqlite 로 두면 작업을 받은 워커 프로세스와 다른 프로세스에서도 결과를 읽을 수 있다.
+    """
+
+    def __init__(self, store: SessionStore, workers: int = 4, max_pending: int = 256):
+        self.store = store
+        self.workers = workers
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._claims: Dict[str, asyncio.Future] = {}  # owner → 예약 중인 submit_once 의 결과
+        # 지표
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+
+    # -- 수명주기 ---------------------------------------------------------------
+    def start(self) -> None:
+        if self._tasks and not all(t.done() for t in self._tasks):
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        # 작업 중이던 워커가 finally 에서 큐를 쓰므로 끝날 때까지 기다린 뒤 큐를 놓는다
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    # -- 작업 ------------------------------------------------------------------
+    async def submit(self, fn: Callable[[], Awaitable[Dict[str, Any]]], owner: Optional[str] = None) -> str:
+        """fn() 이 돌려준 리포트를 job_id 로 저장하도록 예약한다."""
+        self.start()  # lifespan 이 없는 환경을 위해 지연 시작
+        if self._queue.full():
+            self.rejected += 1
+            raise JobQueueFull(self.retry_after())
+        job_id = uuid.uuid4().hex
+        # 워커가 결과를 쓰기 전에 pending 을 먼저 저장해 둔다 (저장을 기다리는 사이 큐가 찰 수 있음)
+        await self.store.aput(job_id, {"status": PENDING})
+        try:
+            self._queue.put_nowait((job_id, fn))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            await self.store.adelete(job_id)
+            raise JobQueueFull(self.retry_after())
+        if owner is not None:
+            await self.store.aput(_owner_key(owner), {"job_id": job_id})
+        self.submitted += 1
+        return job_id
+
+    async def submit_once(self, owner: str, fn: Callable[[], Awaitable[Dict[str, Any]]],
+                          check: Optional[Callable[[], Awaitable[Any]]] = None) -> str:
+        """
+        owner 의 작업이 남아 있으면 그 job_id, 없으면 check() 를 부른 뒤 새로 예약한다.
+        같은 owner 의 호출이 겹치면 뒤에 온 쪽은 먼저 온 쪽의 결과(job_id 또는 예외)를 함께 받는다:
+        job_of 확인과 submit 사이에 끼어든 두 번째 요청이 작업을 또 예약하지 않도록 (프로세스 안에서만).
+        """
+        fut = self._claims.get(owner)
+        if fut is not None:
+            return await asyncio.shield(fut)
+        fut = asyncio.get_running_loop().create_future()
+        self._claims[owner] = fut
+        try:
+            job_id = await self.job_of(owner)
+            if job_id is None:
+                if check is not None:
+                    await check()
+                job_id = await self.submit(fn, owner=owner)
+        except BaseException as e:
+            if isinstance(e, Exception):
+                fut.set_exception(e)
+                fut.exception()  # 함께 기다리는 쪽이 없어도 "never retrieved" 경고가 나지 않도록
+            else:
+                fut.cancel()
+            raise
+        else:
+            fut.set_result(job_id)
+            return job_id
+        finally:
+            del self._claims[owner]
+
+    async def job_of(self, owner: str) -> Optional[str]:
+        """owner 가 예약한 작업 중 아직 결과를 찾아가지 않은 것의 job_id (없으면 None)."""
+        link = await self.store.aget(_owner_key(owner))
+        if link is None:
+            return None
+        if await self.store.aget(link["job_id"]) is None:
+            await self.store.adelete(_owner_key(owner))
+            return None
+        return link["job_id"]
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, fn = await self._queue.get()
+            t0 = time.perf_counter()
+            try:
+                report = await fn()
+                await self.store.aput(job_id, {"status": DONE, "report": report})
+                self.completed += 1
+            except Exception as e:
+                print("Report job error:", e)
+                await self.store.aput(job_id, {"status": ERROR})
+                self.failed += 1
+            finally:
+                self.busy_seconds += time.perf_counter() - t0
+                self._queue.task_done()
+
+    def fetch(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 상태. 끝난 작업(done/error)은 돌려주면서 지운다. 없거나 만료됐거나 작업 id 가 아니면 None."""
+        if not _JOB_ID_RE.fullmatch(job_id):
+            return None
+        job = self.store.get(job_id)
+        if job is None or "status" not in job:
+            return None
+        if job["status"] != PENDING:
+            self.store.delete(job_id)
+        return job
+
+    def retry_after(self) -> float:
+        """대기 중인 작업이 다 빠질 때까지 걸릴 시간 추정 (평균 작업 시간 × 대기 수 / 워커 수)"""
+        done = self.completed + self.failed
+        avg = self.busy_seconds / done if done else 1.0
+        return max(1.0, avg * self.pending / max(1, self.workers))
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_job_seconds": self.busy_seconds / done if done else 0.0,
+            "store": self.store.stats(),
+        }
+
+
+def report_jobs_from_env() -> ReportJobs:
+    """
+    REPORT_WORKERS / REPORT_MAX_PENDING : 워커 수 / 대기 작업 상한
+    REPORT_BACKEND, REPORT_MAX, REPORT_IDLE_TTL, REPORT_DB_PATH : 결과 저장소 (store_from_env 와 같은 규칙)
+    REPORT_BACKEND / REPORT_DB_PATH 를 주지 않으면 세션 저장소(SESSION_BACKEND / SESSION_DB_PATH)를 따른다:
+    워커 여럿이 세션을 sqlite 로 공유하면 리포트 폴링도 어느 워커에 닿든 같은 결과를 봐야 한다.
+    """
+    return ReportJobs(
+        store_from_env("REPORT", table="reports", default_max=1000, default_ttl=300,
+                       default_backend=os.getenv("SESSION_BACKEND", "memory"),
+                       default_path=os.getenv("SESSION_DB_PATH", "rapport_sessions.db")),
+        workers=int(os.getenv("REPORT_WORKERS", "4")),
+        max_pending=int(os.getenv("REPORT_MAX_PENDING", "256")),
+    )
@@ -0,0 +1,260 @@
+# backend/session_store.py — 세션 저장소 (인메모리 LRU / SQLite WAL)
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+import anyio
+
+try:
+    from backend.ttl_cache import TTLCache
+except ModuleNotFoundError:
+    from ttl_cache import TTLCache
+
+
+T = TypeVar("T")
+
+
+class SessionStore:
+    """
+    세션 저장소 인터페이스.
+    get() 으로 꺼낸 세션 dict 를 수정했다면 바꾼 필드만 update() 로 다시 저장해야 한다
+    (SQLite 처럼 프로세스 밖에 두는 백엔드는 복사본을 돌려주기 때문).
+    이벤트 루프 위(async 처리기)에서는 aget()/aput()/aupdate()/adelete()/asweep() 을 쓴다:
+    blocking 백엔드는 스레드풀에서 실행해 잠금 대기가 워커의 다른 요청을 멈추지 않게 한다.
+    """
+
+    blocking = False  # True 면 a*() 메서드가 스레드풀로 넘긴다
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        if not self.blocking:
+            return fn(*args)
+        return await anyio.to_thread.run_sync(fn, *args)
+
+    async def aget(self, sid: str) -> Optional[Dict[str, Any]]:
+        return await self._run(self.get, sid)
+
+    async def aput(self, sid: str, sess: Dict[str, Any]) -> None:
+        await self._run(self.put, sid, sess)
+
+    async def aupdate(self, sid: str, fields: Dict[str, Any]) -> bool:
+        return await self._run(self.update, sid, fields)
+
+    async def adelete(self, sid: str) -> None:
+        await self._run(self.delete, sid)
+
+    async def asweep(self) -> int:
+        return await self._run(self.sweep)
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put(self, sid: str, sess: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def update(self, sid: str, fields: Dict[str, Any]) -> bool:
+        """
+        이미 있는 세션의 fields 키만 바꾼다 (나머지 필드는 저장된 최신 값 유지).
+        같은 세션을 여러 작업이 나눠 쓸 때 서로의 필드를 덮지 않도록 쓴다.
+        """
+        raise NotImplementedError
+
+    def delete(self, sid: str) -> None:
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """만료된 세션을 정리하고 정리한 개수를 돌려준다."""
+        return 0
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def __contains__(self, sid: str) -> bool:
+        return self.get(sid) is not None
+
+
+class MemorySessionStore(SessionStore):
+    """단일 프로세스용. 유휴 TTL + 최대 개수(LRU) 초과분을 밀어낸다."""
+
+    def __init__(self, max_size: int = 10000, idle_ttl: float = 1800):
+        self._cache = TTLCache(max_size, idle_ttl)
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(sid)
+
+    def put(self, sid: str, sess: Dict[str, Any]) -> None:
+        self._cache.set(sid, sess)
+
+    def update(self, sid: str, fields: Dict[str, Any]) -> bool:
+        sess = self._cache.get(sid)
+        if sess is None:
+            return False
+        sess.update(fields)
+        return True
+
+    def delete(self, sid: str) -> None:
+        self._cache.pop(sid)
+
+    def sweep(self) -> int:
+        return self._cache.sweep()
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._cache
+
+    def stats(self) -> Dict[str, Any]:
+        s = self._cache.stats()
+        return {
+            "backend": "memory",
+            "active": s["size"],
+            "max_size": s["max_size"],
+            "idle_ttl": s["idle_ttl"],
+            "evicted_ttl": s["evicted_ttl"],
+            "evicted_lru": s["evicted_lru"],
+        }
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    여러 uvicorn 워커가 공유하는 로컬 SQLite(WAL) 저장소.
+    세션은 JSON 으로 직렬화되며, 만료/축출 카운터도 DB 에 두어 모든 워커가 같은 값을 본다.
+    쓰기 잠금 대기(busy timeout)로 최대 10초까지 막힐 수 있으므로 이벤트 루프에서는 a*() 메서드로 부른다.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_size: int = 10000, idle_ttl: float = 1800, table: str = "sessions"):
+        self.path = path
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "sid TEXT PRIMARY KEY, data TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table}(last_access)")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table}_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _bump(self, name: str, n: int) -> None:
+        if n:
+            self._conn.execute(
+                f"INSERT INTO {self.table}_stats(name, value) VALUES(?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, n),
+            )
+
+    def _sweep_locked(self, now: float) -> int:
+        if self.idle_ttl <= 0:
+            return 0
+        cur = self._conn.execute(f"DELETE FROM {self.table} WHERE last_access < ?", (now - self.idle_ttl,))
+        self._bump("evicted_ttl", cur.rowcount)
+        return cur.rowcount
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data, last_access FROM {self.table} WHERE sid = ?", (sid,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.idle_ttl > 0 and now - row[1] > self.idle_ttl:
+                cur = self._conn.execute(f"DELETE FROM {self.table} WHERE sid = ?", (sid,))
+                self._bump("evicted_ttl", cur.rowcount)
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE sid = ?", (now, sid))
+            return json.loads(row[0])
+
+    def put(self, sid: str, sess: Dict[str, Any]) -> None:
+        now = time.time()
+        data = json.dumps(sess, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    f"INSERT INTO {self.table}(sid, data, last_access) VALUES(?, ?, ?) "
+                    "ON CONFLICT(sid) DO UPDATE SET data = excluded.data, last_access = excluded.last_access",
+                    (sid, data, now),
+                )
+                self._sweep_locked(now)
+                over = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0] - self.max_size
+                if over > 0:
+                    cur = self._conn.execute(
+                        f"DELETE FROM {self.table} WHERE sid IN "
+                        f"(SELECT sid FROM {self.table} ORDER BY last_access LIMIT ?)",
+                        (over,),
+                    )
+                    self._bump("evicted_lru", cur.rowcount)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def update(self, sid: str, fields: Dict[str, Any]) -> bool:
+        now = time.time()
+        with self._lock:
+            # 읽고 고쳐 쓰는 사이에 다른 워커가 끼어들지 않도록 쓰기 잠금을 먼저 잡는다
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT data FROM {self.table} WHERE sid = ? AND last_access >= ?",
+                    (sid, now - self.idle_ttl if self.idle_ttl > 0 else float("-inf")),
+                ).fetchone()
+                if row is not None:
+                    sess = json.loads(row[0])
+                    sess.update(fields)
+                    self._conn.execute(
+                        f"UPDATE {self.table} SET data = ?, last_access = ? WHERE sid = ?",
+                        (json.dumps(sess, ensure_ascii=False), now, sid),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row is not None
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE sid = ?", (sid,))
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep_locked(time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            counters = dict(self._conn.execute(f"SELECT name, value FROM {self.table}_stats").fetchall())
+        return {
+            "backend": "sqlite",
+            "active": active,
+            "max_size": self.max_size,
+            "idle_ttl": self.idle_ttl,
+            "evicted_ttl": counters.get("evicted_ttl", 0),
+            "evicted_lru": counters.get("evicted_lru", 0),
+        }
+
+
+def store_from_env(prefix: str = "SESSION", table: str = "sessions",
+                   default_max: int = 10000, default_ttl: float = 1800,
+                   default_backend: str = "memory", default_path: str = "rapport_sessions.db") -> SessionStore:
+    """
+    {prefix}_BACKEND   : memory(기본: default_backend) | sqlite
+    {prefix}_MAX       : 최대 보관 개수
+    {prefix}_IDLE_TTL  : 마지막 접근 후 만료까지 초
+    {prefix}_DB_PATH   : sqlite 파일 경로 (워커 간 공유)
+    """
+    backend = os.getenv(f"{prefix}_BACKEND", default_backend).lower()
+    max_size = int(os.getenv(f"{prefix}_MAX", str(default_max)))
+    idle_ttl = float(os.getenv(f"{prefix}_IDLE_TTL", str(default_ttl)))
+    if backend == "sqlite":
+        path = os.getenv(f"{prefix}_DB_PATH", default_path)
+        return SQLiteSessionStore(path, max_size=max_size, idle_ttl=idle_ttl, table=table)
+    return MemorySessionStore(max_size=max_size, idle_ttl=idle_ttl)
@@ -0,0 +1,102 @@
+# backend/ttl_cache.py — 크기 상한(LRU) + 유휴 TTL 을 갖는 인메모리 캐시
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class TTLCache:
+    """
+    마지막 접근 시각 기준 idle_ttl 초가 지나면 만료되고,
+    max_size 를 넘으면 가장 오래 접근하지 않은 항목부터 밀려난다.
+    OrderedDict 를 접근 순서로 유지하므로 만료 정리는 앞쪽에서부터 O(만료 개수).
+    touch_on_get=False 이면 조회해도 만료 시각은 그대로라 저장 시점 기준 고정 TTL 로 동작한다
+    (LRU 순서는 갱신되므로, 조회된 항목의 만료는 조회 시점이나 LRU 축출 때 처리된다).
+    """
+
+    def __init__(self, max_size: int, idle_ttl: float, clock: Callable[[], float] = time.monotonic,
+                 touch_on_get: bool = True):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.touch_on_get = touch_on_get
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, list]" = OrderedDict()  # key -> [value, last_access]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+
+    def _expired(self, last_access: float, now: float) -> bool:
+        return self.idle_ttl > 0 and now - last_access > self.idle_ttl
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if self._expired(entry[1], now):
+                del self._data[key]
+                self.evicted_ttl += 1
+                self.misses += 1
+                return default
+            if self.touch_on_get:
+                entry[1] = now
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        now = self._clock()
+        with self._lock:
+            self._data[key] = [value, now]
+            self._data.move_to_end(key)
+            self._sweep_locked(now)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evicted_lru += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def __contains__(self, key: Hashable) -> bool:
+        now = self._clock()
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and not self._expired(entry[1], now)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _sweep_locked(self, now: float) -> int:
+        removed = 0
+        while self._data:
+            key, entry = next(iter(self._data.items()))
+            if not self._expired(entry[1], now):
+                break
+            del self._data[key]
+            removed += 1
+        self.evicted_ttl += removed
+        return removed
+
+    def sweep(self) -> int:
+        """만료된 항목을 정리하고 정리한 개수를 돌려준다."""
+        with self._lock:
+            return self._sweep_locked(self._clock())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "idle_ttl": self.idle_ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted_ttl": self.evicted_ttl,
+            "evicted_lru": self.evicted_lru,
+        }
@@ -22,8 +22,9 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    // 202 + job_id (리포트는 /api/report/{jobId} 에서 조회)
     const data = await response.json();
-    return NextResponse.json(data);
+    return NextResponse.json(data, { status: response.status });
   } catch (error) {
     console.error('Finalize API error:', error);
     return NextResponse.json(
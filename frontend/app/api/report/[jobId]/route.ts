@@ -0,0 +1,34 @@
+import { NextRequest, NextResponse } from 'next/server';
+
+const BACKEND_URL = process.env.BACKEND_URL || 'http://localhost:8000';
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ jobId: string }> }
+) {
+  try {
+    const { jobId } = await params;
+
+    const response = await fetch(`${BACKEND_URL}/report/${encodeURIComponent(jobId)}`, {
+      cache: 'no-store',
+    });
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({}));
+      return NextResponse.json(
+        { error: errorData.detail || '리포트 조회 실패' },
+        { status: response.status }
+      );
+    }
+
+    // 작업 중이면 202 {status: "pending"}, 끝났으면 200 {status: "done", report}
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    console.error('Report API error:', error);
+    return NextResponse.json(
+      { error: '서버 연결 실패' },
+      { status: 500 }
+    );
+  }
+}
@@ -76,7 +76,8 @@ export function ChatPanel({
             </div>
           </div>
         ))}
-        {botTyping && <TypingBubble />}
+        {/* 스트리밍 응답이 도착하기 시작하면 말풍선 대신 실제 텍스트를 보여준다 */}
+        {botTyping && messages[messages.length - 1]?.role !== "bot" && <TypingBubble />}
         <div ref={endRef} />
       </div>
 
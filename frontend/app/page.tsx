@@ -8,6 +8,20 @@ import { LoadingOverlay } from "./components/LoadingOverlay";
 import { Message, ReportData } from "./types";
 
 const API = process.env.NEXT_PUBLIC_API_BASE || "";
+const REPORT_POLL_INTERVAL_MS = 700;
+const REPORT_POLL_TIMEOUT_MS = 120_000;
+
+// crypto.randomUUID 는 보안 컨텍스트(https, localhost)에서만 있다. LAN 의 http 주소로 열면 없으므로 대신 만든다
+function newIdempotencyKey(): string {
+  if (typeof crypto !== "undefined" && typeof crypto.randomUUID === "function") {
+    return crypto.randomUUID();
+  }
+  if (typeof crypto !== "undefined" && typeof crypto.getRandomValues === "function") {
+    const bytes = crypto.getRandomValues(new Uint8Array(16));
+    return Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+}
 
 export default function Home() {
   // ----- state -----
@@ -86,16 +100,51 @@ export default function Home() {
 
     try {
       setBotTyping(true);
-      const res = await fetch(`${API}/chat`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ session_id: sessionId, text: userText }),
-      });
-      const data = await res.json();
+      // ⬇️ 발화마다 멱등 키를 붙여 보낸다: 연결이 끊겨 다시 보내도 서버 기록엔 한 턴만 남고 같은 응답을 받는다
+      const idempotencyKey = newIdempotencyKey();
+      const post = () =>
+        fetch(`${API}/chat/stream`, {
+          method: "POST",
+          headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKey },
+          body: JSON.stringify({ session_id: sessionId, text: userText, idempotency_key: idempotencyKey }),
+        });
+      const res = await post().catch(post);
+      if (!res.ok || !res.body) throw new Error("메시지 전송 실패");
+
+      // ⬇️ SSE 토큰을 받는 대로 봇 응답에 이어 붙이고, done 이벤트의 최종본으로 교체
+      let started = false;
+      const showBotText = (text: string) => {
+        const botMsg: Message = { role: "bot", text };
+        const first = !started;
+        started = true;
+        setMessages((prev) => (first ? [...prev, botMsg] : [...prev.slice(0, -1), botMsg]));
+      };
 
-      // ⬇️ 봇 응답 추가
-      const botMsg: Message = { role: "bot", text: data.assistant };
-      setMessages((prev) => [...prev, botMsg]);
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let botText = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop() ?? "";
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = raw.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue;
+          const payload = JSON.parse(data);
+          if (event === "token") {
+            botText += payload.text;
+            showBotText(botText);
+          } else if (event === "done") {
+            showBotText(payload.assistant);
+          } else if (event === "error") {
+            throw new Error(payload.detail);
+          }
+        }
+      }
     } catch {
       alert("메시지 전송 오류");
     } finally {
@@ -103,6 +152,21 @@ export default function Home() {
     }
   }
 
+  // 리포트는 백그라운드에서 만들어지므로 끝날 때까지 조회한다 (한 번 받으면 서버에서 지워짐)
+  async function pollReport(jobId: string): Promise<ReportData> {
+    const deadline = Date.now() + REPORT_POLL_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      const res = await fetch(`${API}/report/${jobId}`);
+      if (res.status === 200) {
+        const data = await res.json();
+        return data.report;
+      }
+      if (res.status !== 202) throw new Error("리포트 조회 실패");
+      await new Promise((resolve) => setTimeout(resolve, REPORT_POLL_INTERVAL_MS));
+    }
+    throw new Error("리포트 생성 시간 초과");
+  }
+
   async function finalize() {
     if (!sessionId) return;
     setIsLoading(true);
@@ -112,8 +176,10 @@ export default function Home() {
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ session_id: sessionId }),
       });
+      if (!res.ok) throw new Error("리포트 생성 실패");
+      // 서버리스 배포(REPORT_ASYNC=0)는 200 으로 리포트를 바로 주고, 그 밖에는 202 + job_id 로 조회한다
       const data = await res.json();
-      setReport(data.report);
+      setReport(data.report ?? (await pollReport(data.job_id)));
     } catch {
       alert("리포트 생성 오류");
     } finally {